@@ -0,0 +1,59 @@
+import ast
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Statements that define a named function, async view or class
+_DEFINITION_NODE_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# File name suffixes that hold views, in lookup priority order
+VIEW_FILE_SUFFIXES = ('views.py', 'handlers.py', 'viewsets.py', 'api.py')
+
+# Packages whose modules the view, URL and model analyzers reopen
+_SHARED_TREE_DIRS = frozenset({'views', 'models'})
+
+class ASTCache:
+    """Share parsed ASTs between analyzers so each file is parsed once per run"""
+    
+    def __init__(self):
+        self._entries = {}  # Map of file path to (mtime_ns, size, tree, top_defs)
+    
+    def get(self, file_path: Path, source: bytes = None, stat: os.stat_result = None) -> Tuple[ast.Module, Dict[str, ast.AST]]:
+        """Return the parsed tree and its top-level definitions by name, parsing source if already read"""
+        
+        # Callers passing source must pass the stat they took before reading it
+        path = str(file_path)
+        if stat is None:
+            stat = os.stat(path)
+        
+        cached = self._entries.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2], cached[3]
+        
+        # Hand ast.parse raw bytes; the tokenizer decodes them per PEP 263
+        if source is None:
+            with open(path, 'rb') as f:
+                source = f.read()
+        tree = ast.parse(source, filename=path)
+        
+        top_defs = {
+            node.name: node
+            for node in tree.body
+            if isinstance(node, _DEFINITION_NODE_TYPES)
+        }
+        
+        self._entries[path] = (stat.st_mtime_ns, stat.st_size, tree, top_defs)
+        return tree, top_defs
+    
+    def shares(self, file_path: Path) -> bool:
+        """Whether a later analyzer reopens this file, so its tree is worth keeping"""
+        name = os.path.basename(file_path)
+        return (
+            name.endswith(VIEW_FILE_SUFFIXES)
+            or name == 'models.py'
+            or os.path.basename(os.path.dirname(file_path)) in _SHARED_TREE_DIRS
+        )
+    
+    def clear(self):
+        """Drop all cached trees"""
+        self._entries.clear()
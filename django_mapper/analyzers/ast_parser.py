@@ -1,12 +1,102 @@
 import ast
+import hashlib
+import os
+import re
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django_mapper.analyzers.ast_cache import ASTCache
+from django_mapper.storage.parse_cache import ParseCache
+from django_mapper.utils.helpers import (
+    PARALLEL_MIN_FILES,
+    THREADED_IO_MIN_FILES,
+    dotted_name,
+    file_sha256,
+    process_map,
+    relative_path,
+    thread_map,
+    walk_ast,
+)
+
+# Path substrings that mark a file as third-party or generated, matched in one C-level search
+_EXCLUDE_RE = re.compile('|'.join(re.escape(pattern) for pattern in (
+    'site-packages',
+    'venv',
+    'env',
+    '.venv',
+    'virtualenv',
+    'migrations',  # Django migrations
+    '__pycache__',
+    '.git',
+    'node_modules',
+)))
+
+# Calls whose first argument names an environment variable (config is python-decouple's)
+_ENV_VAR_CALLS = frozenset({'os.environ.get', 'os.getenv', 'config', 'decouple.config'})
+
+# Names EnvDetector treats as environment variables
+_ENV_VAR_NAME_RE = re.compile(r'[A-Z_][A-Z0-9_]*')
+
+# Method names a class-based view dispatches HTTP verbs to
+_HTTP_METHODS = frozenset({'get', 'post', 'put', 'patch', 'delete', 'head', 'options'})
+
+# Node types that can never contain a call, so the call scan does not descend into them
+_NO_CALL_TYPES = frozenset(
+    {ast.Name, ast.Constant, ast.alias, ast.Pass, ast.Break, ast.Continue,
+     ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal}
+    | {
+        node_type
+        for base in (ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop)
+        for node_type in base.__subclasses__()
+    }
+)
+
+def _iter_calls(node) -> Iterator[ast.Call]:
+    """Yield the Call nodes under node in source order, skipping subtrees that cannot hold one"""
+    AST = ast.AST
+    Call = ast.Call
+    stack = [node]
+    
+    while stack:
+        current = stack.pop()
+        if type(current) is Call:
+            yield current
+        
+        children = []
+        for field in current._fields:
+            value = getattr(current, field, None)
+            if type(value) is list:
+                children.extend(
+                    item for item in value
+                    if isinstance(item, AST) and type(item) not in _NO_CALL_TYPES
+                )
+            elif isinstance(value, AST) and type(value) not in _NO_CALL_TYPES:
+                children.append(value)
+        
+        # Push in reverse so children are visited first-to-last
+        stack.extend(reversed(children))
+
+def _cache_key(file_path: Path) -> Optional[bytes]:
+    """Content hash for the parse cache, or None if the file cannot be read"""
+    try:
+        return file_sha256(file_path)
+    except (OSError, ValueError):
+        return None  # The parse worker reports the read error
+
+def _parse_file_worker(project_path: Path, file_path: Path) -> Optional[Dict]:
+    """Parse one file in a worker process; cache lookups stay in the parent"""
+    return ASTParser(project_path).parse_file(file_path)
 
 class ASTParser:
     """Parse Python files using AST to extract detailed code structure"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, parse_cache: ParseCache = None, ast_cache: ASTCache = None):
         self.project_path = project_path
+        self.parse_cache = parse_cache
+        self.ast_cache = ast_cache
+        self._project_prefix = str(project_path) + os.sep
+        self._node_names = {}  # Map of id(node) to its name, for the tree being parsed
         
     def parse_file(self, file_path: Path) -> Optional[Dict]:
         """Parse a Python file and extract all relevant information"""
@@ -15,22 +105,99 @@ class ASTParser:
         if not self._is_project_file(file_path):
             return None
         
+        # Only trees a later analyzer reopens go into the shared cache
+        shared = self.ast_cache is not None and self.ast_cache.shares(file_path)
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tree = ast.parse(content, filename=str(file_path))
+            # Stat before reading, so an edit in between cannot be cached as current
+            stat = os.stat(file_path) if shared else None
+            with open(file_path, 'rb') as f:
+                source = f.read()
+            
+            # Reuse the result of an earlier run when the content is unchanged
+            if self.parse_cache:
+                sha = hashlib.sha256(source).digest()
+                cached = self.parse_cache.get(str(file_path), sha)
+                if cached is not None:
+                    return cached
+            
+            # Parse through the shared cache so later analyzers reuse this tree
+            if shared:
+                tree = self.ast_cache.get(file_path, source, stat)[0]
+            else:
+                # Type comments are never read by the extractors, so keep them out of the tree
+                tree = ast.parse(source, filename=str(file_path), type_comments=False)
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
             return None
         
-        return {
-            'file_path': str(file_path.relative_to(self.project_path)),
-            'classes': self._extract_classes(tree),
+        # Only the tree is needed from here on
+        del source
+        
+        # Node ids are only stable while this tree is alive, so names are memoized per parse
+        self._node_names = {}
+        classes, imports, decorators, env_vars = self._collect_tree(tree)
+        parsed = {
+            'file_path': relative_path(file_path, self.project_path),
+            'classes': classes,
             'functions': self._extract_functions(tree),
-            'imports': self._extract_imports(tree),
+            'imports': imports,
             'constants': self._extract_constants(tree),
-            'decorators': self._extract_decorators(tree),
+            'decorators': decorators,
+            'env_vars': env_vars,
         }
+        
+        # Release our reference before pickling the result; only view and model
+        # trees stay alive in the shared cache
+        self._node_names = {}
+        del tree
+        
+        if self.parse_cache:
+            self.parse_cache.put(str(file_path), sha, parsed)
+        
+        return parsed
+    
+    def parse_files(self, file_paths: List[Path]) -> Dict[str, Dict]:
+        """Parse many files, keyed by relative path, using all CPU cores for larger projects"""
+        
+        file_paths = [file_path for file_path in file_paths if self._is_project_file(file_path)]
+        
+        if len(file_paths) < PARALLEL_MIN_FILES:
+            results = [self.parse_file(file_path) for file_path in file_paths]
+        else:
+            results = self._parse_files_parallel(file_paths)
+        
+        return {parsed['file_path']: parsed for parsed in results if parsed}
+    
+    def _parse_files_parallel(self, file_paths: List[Path]) -> List[Optional[Dict]]:
+        """Serve cache hits here and fan the misses out to worker processes"""
+        results = [None] * len(file_paths)
+        misses = []  # (index, file_path, sha) of files that still need parsing
+        
+        # Hashing is read-bound; on big cold trees keep many reads in flight at once
+        shas = [None] * len(file_paths)
+        if self.parse_cache:
+            if len(file_paths) >= THREADED_IO_MIN_FILES:
+                shas = thread_map(_cache_key, file_paths)
+            else:
+                shas = [_cache_key(file_path) for file_path in file_paths]
+        
+        for index, (file_path, sha) in enumerate(zip(file_paths, shas)):
+            if sha is not None:
+                results[index] = self.parse_cache.get(str(file_path), sha)
+                if results[index] is not None:
+                    continue
+            misses.append((index, file_path, sha))
+        
+        worker = partial(_parse_file_worker, self.project_path)
+        parsed_misses = process_map(worker, [file_path for _, file_path, _ in misses])
+        
+        for (index, file_path, sha), parsed in zip(misses, parsed_misses):
+            if parsed is not None and sha is not None:
+                self.parse_cache.put(str(file_path), sha, parsed)
+            results[index] = parsed
+        
+        return results
     
     def _is_project_file(self, file_path: Path) -> bool:
         """Check if file is part of the actual project (not third-party)"""
@@ -38,59 +205,98 @@ class ASTParser:
         file_str = str(file_path)
         
         # Exclude patterns
-        exclude_patterns = [
-            'site-packages',
-            'venv',
-            'env',
-            '.venv',
-            'virtualenv',
-            'migrations',  # Django migrations
-            '__pycache__',
-            '.git',
-            'node_modules',
-        ]
-        
-        for pattern in exclude_patterns:
-            if pattern in file_str:
-                return False
-        
-        # Must be within project path
+        if _EXCLUDE_RE.search(file_str):
+            return False
+        
+        # Must be within project path; the prefix check covers absolute paths without building parts
+        if file_str.startswith(self._project_prefix):
+            return True
         try:
             file_path.relative_to(self.project_path)
             return True
         except ValueError:
             return False
     
-    def _extract_classes(self, tree) -> List[Dict]:
-        """Extract all class definitions with detailed information"""
+    def _collect_tree(self, tree) -> Tuple[List[Dict], List[Dict], List[str], List[str]]:
+        """Collect classes, imports, unique decorators and env var names in a single pass over the tree"""
         classes = []
+        imports = []
+        decorators = set()
+        env_vars = set()
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                class_info = {
-                    'name': node.name,
-                    'line_number': node.lineno,
-                    'end_line': node.end_lineno,
-                    'docstring': ast.get_docstring(node),
-                    'base_classes': [self._get_node_name(base) for base in node.bases],
-                    'decorators': [self._get_node_name(dec) for dec in node.decorator_list],
-                    'methods': self._extract_class_methods(node),
-                    'class_variables': self._extract_class_variables(node),
-                    'is_abstract': self._is_abstract_class(node),
-                    'is_django_model': self._is_django_model(node),
-                    'is_django_view': self._is_django_view(node),
-                    'is_rest_framework': self._is_rest_framework_class(node),
-                }
-                classes.append(class_info)
+        for node in walk_ast(tree):
+            node_type = type(node)
+            
+            if node_type is ast.Call:
+                if node.args and dotted_name(node.func) in _ENV_VAR_CALLS:
+                    self._add_env_var(env_vars, node.args[0])
+                continue
+            elif node_type is ast.Subscript:
+                if dotted_name(node.value) == 'os.environ':
+                    self._add_env_var(env_vars, node.slice)
+                continue
+            elif node_type is ast.ClassDef:
+                classes.append(self._extract_class_info(node))
+            elif node_type is ast.Import:
+                for alias in node.names:
+                    imports.append({
+                        'type': 'import',
+                        'module': alias.name,
+                        'alias': alias.asname,
+                        'line_number': node.lineno,
+                    })
+                continue
+            elif node_type is ast.ImportFrom:
+                for alias in node.names:
+                    imports.append({
+                        'type': 'from_import',
+                        'module': node.module or '',
+                        'name': alias.name,
+                        'alias': alias.asname,
+                        'line_number': node.lineno,
+                    })
+                continue
+            elif node_type is not ast.FunctionDef:
+                continue
+            
+            # Classes and (sync) functions both contribute their decorators
+            for dec in node.decorator_list:
+                decorators.add(self._get_node_name(dec))
         
-        return classes
+        return classes, imports, sorted(decorators), sorted(env_vars)
+    
+    def _add_env_var(self, env_vars: set, key_node):
+        """Record a string literal used as an environment variable name"""
+        # Python 3.8 wraps subscript keys in ast.Index
+        if type(key_node) is not ast.Constant:
+            key_node = getattr(key_node, 'value', None)
+        if type(key_node) is ast.Constant and type(key_node.value) is str:
+            if _ENV_VAR_NAME_RE.fullmatch(key_node.value):
+                env_vars.add(key_node.value)
+    
+    def _extract_class_info(self, node: ast.ClassDef) -> Dict:
+        """Extract a class definition with detailed information"""
+        return {
+            'name': node.name,
+            'line_number': node.lineno,
+            'end_line': node.end_lineno,
+            'docstring': ast.get_docstring(node),
+            'base_classes': [self._get_node_name(base) for base in node.bases],
+            'decorators': [self._get_node_name(dec) for dec in node.decorator_list],
+            'methods': self._extract_class_methods(node),
+            'class_variables': self._extract_class_variables(node),
+            'is_abstract': self._is_abstract_class(node),
+            'is_django_model': self._is_django_model(node),
+            'is_django_view': self._is_django_view(node),
+            'is_rest_framework': self._is_rest_framework_class(node),
+        }
     
     def _extract_class_methods(self, class_node: ast.ClassDef) -> List[Dict]:
         """Extract all methods from a class"""
         methods = []
         
         for item in class_node.body:
-            if isinstance(item, ast.FunctionDef):
+            if type(item) is ast.FunctionDef:
                 method_info = {
                     'name': item.name,
                     'line_number': item.lineno,
@@ -113,15 +319,15 @@ class ASTParser:
         variables = []
         
         for item in class_node.body:
-            if isinstance(item, ast.Assign):
+            if type(item) is ast.Assign:
                 for target in item.targets:
-                    if isinstance(target, ast.Name):
+                    if type(target) is ast.Name:
                         variables.append({
                             'name': target.id,
                             'line_number': item.lineno,
                             'value': self._get_value_repr(item.value),
                         })
-            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+            elif type(item) is ast.AnnAssign and type(item.target) is ast.Name:
                 variables.append({
                     'name': item.target.id,
                     'line_number': item.lineno,
@@ -136,7 +342,7 @@ class ASTParser:
         functions = []
         
         for node in tree.body:
-            if isinstance(node, ast.FunctionDef):
+            if type(node) is ast.FunctionDef:
                 func_info = {
                     'name': node.name,
                     'line_number': node.lineno,
@@ -153,39 +359,14 @@ class ASTParser:
         
         return functions
     
-    def _extract_imports(self, tree) -> List[Dict]:
-        """Extract all import statements"""
-        imports = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.append({
-                        'type': 'import',
-                        'module': alias.name,
-                        'alias': alias.asname,
-                        'line_number': node.lineno,
-                    })
-            elif isinstance(node, ast.ImportFrom):
-                for alias in node.names:
-                    imports.append({
-                        'type': 'from_import',
-                        'module': node.module or '',
-                        'name': alias.name,
-                        'alias': alias.asname,
-                        'line_number': node.lineno,
-                    })
-        
-        return imports
-    
     def _extract_constants(self, tree) -> List[Dict]:
         """Extract module-level constants"""
         constants = []
         
         for node in tree.body:
-            if isinstance(node, ast.Assign):
+            if type(node) is ast.Assign:
                 for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id.isupper():
+                    if type(target) is ast.Name and target.id.isupper():
                         constants.append({
                             'name': target.id,
                             'value': self._get_value_repr(node.value),
@@ -194,17 +375,6 @@ class ASTParser:
         
         return constants
     
-    def _extract_decorators(self, tree) -> Set[str]:
-        """Extract all unique decorators used in the file"""
-        decorators = set()
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                for dec in node.decorator_list:
-                    decorators.add(self._get_node_name(dec))
-        
-        return list(decorators)
-    
     def _extract_parameters(self, func_node) -> List[Dict]:
         """Extract function parameters with details"""
         params = []
@@ -228,50 +398,59 @@ class ASTParser:
         """Extract all function calls within a function"""
         calls = []
         
-        for node in ast.walk(func_node):
-            if isinstance(node, ast.Call):
-                call_name = self._get_node_name(node.func)
-                if call_name:
-                    calls.append({
-                        'name': call_name,
-                        'line_number': node.lineno,
-                    })
+        for node in _iter_calls(func_node):
+            call_name = self._get_node_name(node.func)
+            if call_name:
+                calls.append({
+                    'name': call_name,
+                    'line_number': node.lineno,
+                })
         
         return calls
     
     def _get_node_name(self, node) -> str:
         """Get the name/string representation of an AST node"""
-        if node is None:
-            return ''
-        elif isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            base = self._get_node_name(node.value)
-            return f"{base}.{node.attr}" if base else node.attr
-        elif isinstance(node, ast.Call):
-            return self._get_node_name(node.func)
-        elif isinstance(node, ast.Subscript):
-            return self._get_node_name(node.value)
-        elif isinstance(node, ast.Constant):
-            return str(node.value)
-        elif isinstance(node, ast.Str):
-            return node.s
-        return ''
+        key = id(node)
+        name = self._node_names.get(key)
+        if name is not None:
+            return name
+        
+        # Unwind attribute chains iteratively, looking through calls and subscripts
+        attrs = []
+        current = node
+        while True:
+            node_type = type(current)
+            if node_type is ast.Attribute:
+                attrs.append(current.attr)
+                current = current.value
+            elif node_type is ast.Call:
+                current = current.func
+            elif node_type is ast.Subscript:
+                current = current.value
+            else:
+                break
+        
+        if node_type is ast.Name:
+            attrs.append(current.id)
+        elif node_type is ast.Constant and str(current.value):
+            attrs.append(str(current.value))
+        
+        name = '.'.join(reversed(attrs))
+        self._node_names[key] = name
+        return name
     
     def _get_value_repr(self, node) -> str:
         """Get a string representation of a value"""
-        if isinstance(node, ast.Constant):
+        # Most common first: literals and plain names
+        node_type = type(node)
+        if node_type is ast.Constant:
             return repr(node.value)
-        elif isinstance(node, ast.Str):
-            return repr(node.s)
-        elif isinstance(node, ast.Num):
-            return str(node.n)
-        elif isinstance(node, ast.List):
+        elif node_type is ast.Name:
+            return node.id
+        elif node_type is ast.List:
             return '[...]'
-        elif isinstance(node, ast.Dict):
+        elif node_type is ast.Dict:
             return '{...}'
-        elif isinstance(node, ast.Name):
-            return node.id
         return '...'
     
     def _is_property(self, func_node) -> bool:
@@ -288,10 +467,9 @@ class ASTParser:
     
     def _calls_super(self, func_node) -> bool:
         """Check if method calls super()"""
-        for node in ast.walk(func_node):
-            if isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Name) and node.func.id == 'super':
-                    return True
+        for node in _iter_calls(func_node):
+            if type(node.func) is ast.Name and node.func.id == 'super':
+                return True
         return False
     
     def _is_abstract_class(self, class_node: ast.ClassDef) -> bool:
@@ -344,6 +522,6 @@ class ASTParser:
     def _get_http_method(self, func_node: ast.FunctionDef) -> Optional[str]:
         """Get HTTP method for class-based view methods"""
         method_name = func_node.name.lower()
-        if method_name in ['get', 'post', 'put', 'patch', 'delete', 'head', 'options']:
+        if method_name in _HTTP_METHODS:
             return method_name.upper()
         return None
\ No newline at end of file
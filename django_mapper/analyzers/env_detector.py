@@ -2,16 +2,30 @@ import re
 from pathlib import Path
 from typing import List, Dict, Set
 
+from django_mapper.analyzers.project_index import ProjectIndex
+from django_mapper.utils.helpers import mapped_file, relative_path
+
+# os.environ['VAR'], os.environ.get('VAR'), os.getenv('VAR') and python-decouple's config('VAR'),
+# with either quote style, in a single pass over the raw (undecoded) source
+_ENV_VAR_RE = re.compile(
+    rb"""(?:os\.environ\[|os\.environ\.get\(|os\.getenv\(|config\()"""
+    rb"""(?P<q>['"])(?P<name>[A-Z_][A-Z0-9_]*)(?P=q)"""
+)
+
 class EnvDetector:
     """Detect required environment variables in Django project"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, project_index: ProjectIndex = None):
         self.project_path = project_path
+        self.project_index = project_index or ProjectIndex(project_path)
         self.env_vars = set()
+        self.parsed_files = {}  # ASTParser results by relative path, reused instead of rescanning
         
-    def detect(self) -> List[Dict]:
+    def detect(self, parsed_files: Dict[str, Dict] = None) -> List[Dict]:
         """Detect all environment variables used in the project"""
         
+        self.parsed_files = parsed_files or {}
+        
         # Scan settings files
         self._scan_settings_files()
         
@@ -26,16 +40,17 @@ class EnvDetector:
     def _scan_settings_files(self):
         """Scan Django settings files for env var usage"""
         
-        for settings_file in self.project_path.rglob('settings*.py'):
+        for settings_file in self.project_index.build().settings_files:
             if 'site-packages' in str(settings_file) or 'venv' in str(settings_file):
                 continue
             
+            if self._use_parsed_env_vars(settings_file):
+                continue
+            
             try:
-                with open(settings_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
                 # Look for os.environ, os.getenv patterns
-                self._extract_env_vars_from_code(content, settings_file)
+                with mapped_file(settings_file) as content:
+                    self._extract_env_vars_from_code(content, settings_file)
                     
             except Exception as e:
                 print(f"Error reading {settings_file}: {e}")
@@ -65,39 +80,31 @@ class EnvDetector:
     def _scan_python_files(self):
         """Scan all Python files for environment variable usage"""
         
-        for py_file in self.project_path.rglob('*.py'):
+        for py_file in self.project_index.build().python_files:
             if 'site-packages' in str(py_file) or 'venv' in str(py_file):
                 continue
             
+            if self._use_parsed_env_vars(py_file):
+                continue
+            
             try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                with mapped_file(py_file) as content:
                     self._extract_env_vars_from_code(content, py_file)
             except Exception as e:
                 pass  # Skip files that can't be read
     
-    def _extract_env_vars_from_code(self, content: str, file_path: Path):
+    def _use_parsed_env_vars(self, py_file: Path) -> bool:
+        """Take a file's env vars from its ASTParser result, if it was parsed"""
+        parsed = self.parsed_files.get(relative_path(py_file, self.project_path))
+        if parsed is None:
+            return False
+        
+        self.env_vars.update(parsed.get('env_vars', []))
+        return True
+    
+    def _extract_env_vars_from_code(self, content: bytes, file_path: Path):
         """Extract environment variable names from code"""
-        
-        # Pattern 1: os.environ['VAR_NAME']
-        pattern1 = r"os\.environ\[(['\"])([A-Z_][A-Z0-9_]*)\\1\]"
-        
-        # Pattern 2: os.environ.get('VAR_NAME')
-        pattern2 = r"os\.environ\.get\((['\"])([A-Z_][A-Z0-9_]*)\\1"
-        
-        # Pattern 3: os.getenv('VAR_NAME')
-        pattern3 = r"os\.getenv\((['\"])([A-Z_][A-Z0-9_]*)\\1"
-        
-        # Pattern 4: config('VAR_NAME') - for python-decouple
-        pattern4 = r"config\((['\"])([A-Z_][A-Z0-9_]*)\\1"
-        
-        patterns = [pattern1, pattern2, pattern3, pattern4]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                var_name = match.group(2)
-                self.env_vars.add(var_name)
+        self.env_vars.update(match.group('name').decode('ascii') for match in _ENV_VAR_RE.finditer(content))
     
     def _format_env_vars(self) -> List[Dict]:
         """Format environment variables with categorization"""
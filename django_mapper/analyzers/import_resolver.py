@@ -1,21 +1,57 @@
 from pathlib import Path
 from typing import Dict, List, Set, Optional
 import os
+import re
+
+from django_mapper.analyzers.project_index import ProjectIndex
+from django_mapper.utils.helpers import relative_path
+
+# Path substrings that mark a file as third-party or generated, matched in one C-level search
+_EXCLUDE_RE = re.compile('|'.join(re.escape(pattern) for pattern in (
+    'site-packages',
+    'venv',
+    'env',
+    '.venv',
+    'virtualenv',
+    'migrations',
+    '__pycache__',
+    '.git',
+)))
+
+# Common Django/Python packages, always treated as external
+KNOWN_EXTERNAL_PACKAGES = frozenset({
+    'django', 'rest_framework', 'celery', 'redis',
+    'requests', 'numpy', 'pandas', 'pytest',
+    'selenium', 'bs4', 'scrapy', 'flask'
+})
 
 class ImportResolver:
     """Resolve imports and track dependencies between modules"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, project_index: ProjectIndex = None):
         self.project_path = project_path
+        self.project_index = project_index or ProjectIndex(project_path)
         self.module_map = {}  # Map of module names to file paths
         self.dependency_graph = {}  # Map of files to their dependencies
+        self._project_files = None  # Paths (as str) of every project .py file
+        self._project_prefix = str(project_path) + os.sep
+        self._external_modules = {}  # Map of module name to whether it is external
         
     def build_module_map(self):
         """Build a map of all Python modules in the project"""
-        for py_file in self.project_path.rglob('*.py'):
+        self._project_files = set()
+        self._external_modules.clear()
+        for py_file in self.project_index.build().python_files:
             if self._is_project_file(py_file):
                 module_name = self._file_to_module(py_file)
                 self.module_map[module_name] = py_file
+                self._project_files.add(str(py_file))
+    
+    def _is_known_project_file(self, file_path: Path) -> bool:
+        """Check that a candidate path is an existing project file, without touching the disk"""
+        if self._project_files is None:
+            self.build_module_map()
+        return str(file_path) in self._project_files
     
     def resolve_imports(self, file_path: Path, imports: List[Dict]) -> Dict:
         """Resolve where imports come from"""
@@ -57,7 +93,7 @@ class ImportResolver:
             return {
                 'source': 'internal',
                 'module': module,
-                'file_path': str(resolved_path.relative_to(self.project_path)),
+                'file_path': relative_path(resolved_path, self.project_path),
                 'import_info': import_info
             }
         else:
@@ -99,11 +135,11 @@ class ImportResolver:
         ]
         
         for path in possible_paths:
-            if path.exists() and self._is_project_file(path):
+            if self._is_known_project_file(path):
                 return {
                     'source': 'internal',
                     'module': module or '.',
-                    'file_path': str(path.relative_to(self.project_path)),
+                    'file_path': relative_path(path, self.project_path),
                     'import_info': import_info,
                     'relative': True
                 }
@@ -119,25 +155,12 @@ class ImportResolver:
     
     def _find_module_path(self, module_name: str) -> Optional[Path]:
         """Find the file path for a module"""
+        if self._project_files is None:
+            self.build_module_map()
         
-        # Direct lookup
-        if module_name in self.module_map:
-            return self.module_map[module_name]
-        
-        # Try to construct path
-        parts = module_name.split('.')
-        
-        # Try as package
-        package_path = self.project_path / '/'.join(parts) / '__init__.py'
-        if package_path.exists() and self._is_project_file(package_path):
-            return package_path
-        
-        # Try as module
-        module_path = self.project_path / '/'.join(parts[:-1]) / f"{parts[-1]}.py"
-        if module_path.exists() and self._is_project_file(module_path):
-            return module_path
-        
-        return None
+        # Every project package (pkg/__init__.py) and module (pkg/mod.py) is already
+        # keyed by its dotted name, so no candidate paths need to be built
+        return self.module_map.get(module_name)
     
     def _file_to_module(self, file_path: Path) -> str:
         """Convert file path to module name"""
@@ -158,7 +181,7 @@ class ImportResolver:
         """Extract the top-level package name"""
         if not module:
             return 'unknown'
-        return module.split('.')[0]
+        return module.partition('.')[0]
     
     def _is_project_file(self, file_path: Path) -> bool:
         """Check if file is part of the actual project"""
@@ -166,21 +189,11 @@ class ImportResolver:
         file_str = str(file_path)
         
         # Exclude patterns
-        exclude_patterns = [
-            'site-packages',
-            'venv',
-            'env',
-            '.venv',
-            'virtualenv',
-            'migrations',
-            '__pycache__',
-            '.git',
-        ]
-        
-        for pattern in exclude_patterns:
-            if pattern in file_str:
-                return False
+        if _EXCLUDE_RE.search(file_str):
+            return False
         
+        if file_str.startswith(self._project_prefix):
+            return True
         try:
             file_path.relative_to(self.project_path)
             return True
@@ -193,7 +206,7 @@ class ImportResolver:
         graph = {}
         
         for file_path, file_info in all_files.items():
-            dependencies = []
+            dependencies = set()
             
             # Get internal imports
             imports = file_info.get('imports', [])
@@ -204,10 +217,10 @@ class ImportResolver:
                 )
                 
                 if resolved['source'] == 'internal' and resolved['file_path']:
-                    dependencies.append(resolved['file_path'])
+                    dependencies.add(resolved['file_path'])
             
             graph[file_path] = {
-                'depends_on': list(set(dependencies)),
+                'depends_on': sorted(dependencies),
                 'external_packages': self._get_external_packages(file_info)
             }
         
@@ -233,78 +246,90 @@ class ImportResolver:
                 if self._is_external_package(module):
                     packages.add(self._extract_package_name(module))
         
-        return list(packages)
+        return sorted(packages)
     
     def _is_external_package(self, module: str) -> bool:
         """Check if module is an external package"""
         
-        # Common Django/Python packages
-        known_packages = [
-            'django', 'rest_framework', 'celery', 'redis',
-            'requests', 'numpy', 'pandas', 'pytest',
-            'selenium', 'bs4', 'scrapy', 'flask'
-        ]
-        
-        base_module = module.split('.')[0]
-        
-        # Check if it's a known package
-        if base_module in known_packages:
-            return True
-        
-        # Check if it's not in our project
-        if not self._find_module_path(module):
-            return True
-        
-        return False
+        # The same modules are imported across many files, so answer each one once
+        is_external = self._external_modules.get(module)
+        if is_external is None:
+            # Known packages, or anything not in our project
+            is_external = (
+                module.partition('.')[0] in KNOWN_EXTERNAL_PACKAGES
+                or not self._find_module_path(module)
+            )
+            self._external_modules[module] = is_external
+        
+        return is_external
     
     def find_circular_dependencies(self, dependency_graph: Dict) -> List[List[str]]:
         """Find circular dependencies in the project"""
         
         cycles = []
+        seen_cycles = set()
         visited = set()
-        rec_stack = set()
         
-        def dfs(node, path):
-            visited.add(node)
-            rec_stack.add(node)
-            path.append(node)
+        # Iterative DFS sharing one path list; each stack level keeps its neighbor iterator
+        for start in dependency_graph:
+            if start in visited:
+                continue
             
-            for neighbor in dependency_graph.get(node, {}).get('depends_on', []):
-                if neighbor not in visited:
-                    dfs(neighbor, path.copy())
-                elif neighbor in rec_stack:
-                    # Found a cycle
-                    cycle_start = path.index(neighbor)
-                    cycle = path[cycle_start:] + [neighbor]
-                    if cycle not in cycles:
-                        cycles.append(cycle)
+            visited.add(start)
+            path = [start]
+            path_index = {start: 0}  # Map of node on the current path to its position
+            iterators = [iter(dependency_graph[start].get('depends_on', []))]
             
-            rec_stack.remove(node)
-        
-        for node in dependency_graph:
-            if node not in visited:
-                dfs(node, [])
+            while iterators:
+                for neighbor in iterators[-1]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        path_index[neighbor] = len(path)
+                        path.append(neighbor)
+                        iterators.append(iter(dependency_graph.get(neighbor, {}).get('depends_on', [])))
+                        break
+                    
+                    if neighbor in path_index:
+                        # Found a cycle
+                        cycle = path[path_index[neighbor]:] + [neighbor]
+                        cycle_key = tuple(cycle)
+                        if cycle_key not in seen_cycles:
+                            seen_cycles.add(cycle_key)
+                            cycles.append(cycle)
+                else:
+                    # Every neighbor explored; leave this node
+                    iterators.pop()
+                    del path_index[path.pop()]
         
         return cycles
     
     def get_dependency_tree(self, file_path: str, dependency_graph: Dict, max_depth: int = 3) -> Dict:
         """Get dependency tree for a specific file"""
         
-        def build_tree(node, depth, visited):
-            if depth > max_depth or node in visited:
-                return None
-            
-            visited.add(node)
-            
-            deps = dependency_graph.get(node, {}).get('depends_on', [])
+        if max_depth < 0:
+            return None
+        
+        tree = {'file': file_path, 'dependencies': []}
+        
+        # Iterative DFS that builds each node once; a file is skipped only when it
+        # is already an ancestor on the current branch
+        ancestors = {file_path}
+        stack = [(tree, iter(dependency_graph.get(file_path, {}).get('depends_on', [])), 0)]
+        
+        while stack:
+            node, deps, depth = stack[-1]
             
-            return {
-                'file': node,
-                'dependencies': [
-                    build_tree(dep, depth + 1, visited.copy())
-                    for dep in deps
-                    if build_tree(dep, depth + 1, visited.copy()) is not None
-                ]
-            }
+            for dep in deps:
+                if depth + 1 > max_depth or dep in ancestors:
+                    continue
+                
+                child = {'file': dep, 'dependencies': []}
+                node['dependencies'].append(child)
+                ancestors.add(dep)
+                stack.append((child, iter(dependency_graph.get(dep, {}).get('depends_on', [])), depth + 1))
+                break
+            else:
+                stack.pop()
+                ancestors.discard(node['file'])
         
-        return build_tree(file_path, 0, set())
\ No newline at end of file
+        return tree
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+
+from django_mapper.utils.helpers import scandir_recursive
+
+class ProjectIndex:
+    """Walk the project tree once and share the results between analyzers"""
+    
+    def __init__(self, project_path: Path):
+        self.project_path = project_path
+        self.built = False
+        self.files = []  # Every file entry, in walk order
+        self.python_files = []  # Every .py file
+        self.settings_files = []  # settings*.py files
+        self.dir_entries = {}  # Map of directory path to its entries by name
+        self.models_files = []  # models.py files
+        self.models_dirs = []  # Directories named models/
+        self.urls_files = []  # Files ending in urls.py
+    
+    def build(self) -> 'ProjectIndex':
+        """Populate the index on first use and return it"""
+        if self.built:
+            return self
+        
+        for entry in scandir_recursive(self.project_path):
+            self.dir_entries.setdefault(os.path.dirname(entry.path), {})[entry.name] = entry
+            
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name == 'models':
+                    self.models_dirs.append(entry.path)
+                continue
+            
+            if not entry.is_file():
+                continue
+            
+            self.files.append(entry)
+            if not entry.name.endswith('.py'):
+                continue
+            
+            path = Path(entry.path)
+            self.python_files.append(path)
+            if entry.name.startswith('settings'):
+                self.settings_files.append(path)
+            if entry.name == 'models.py':
+                self.models_files.append(path)
+            if entry.name.endswith('urls.py'):
+                self.urls_files.append(path)
+        
+        self.built = True
+        return self
+    
+    def clear(self):
+        """Forget the walk so the next build() rescans the tree"""
+        self.built = False
+        self.files = []
+        self.python_files = []
+        self.settings_files = []
+        self.dir_entries = {}
+        self.models_files = []
+        self.models_dirs = []
+        self.urls_files = []
\ No newline at end of file
@@ -1,6 +1,34 @@
-from typing import Dict, List, Set
+from collections import Counter
+from typing import Dict, List, Optional, Set
 from pathlib import Path
 
+# Characters that cannot appear in a node ID, mapped to underscores
+_ID_TRANSLATION = str.maketrans({'/': '_', '.': '_', ' ': '_'})
+
+# URL trie keys for a segment holding one parameter, a whole-segment <int:...> parameter
+# and a trailing <path:...> parameter; all contain '<', so no literal segment collides
+_PARAM_SEGMENT = '<>'
+_INT_SEGMENT = '<int>'
+_REST_SEGMENT = '<path>'
+
+# Characters that mark a re_path segment as a parameter rather than literal text
+_REGEX_SEGMENT_CHARS = frozenset('([\\*+?|{')
+
+def _url_segments(path: str) -> List[str]:
+    """Split a URL pattern or request path into its non-empty segments"""
+    return [segment for segment in path.split('/') if segment]
+
+def _url_segment_key(segment: str) -> str:
+    """Map a pattern segment to its URL trie key"""
+    segment = segment.lstrip('^').rstrip('$')
+    if '<path:' in segment:
+        return _REST_SEGMENT
+    if segment.startswith('<int:') and segment.endswith('>') and segment.count('<') == 1:
+        return _INT_SEGMENT
+    if '<' in segment or not _REGEX_SEGMENT_CHARS.isdisjoint(segment):
+        return _PARAM_SEGMENT
+    return segment
+
 class FlowBuilder:
     """Build comprehensive flow graphs showing code execution paths"""
     
@@ -8,14 +36,55 @@ class FlowBuilder:
         self.data = analysis_data
         self.nodes = []
         self.edges = []
-        self.flow_sequences = []
+        self.flow_sequences = None  # Request sequences, traced on first get_sequences()
+        self._ids = {}  # Map of (node_type, name) to its node ID
+        self._nodes_by_id = {}  # Map of node ID to the first node added with it
+        self._ids_by_type = {}  # Map of node type to {label: node ID} for the nodes added
+        self._type_counts = Counter()  # Number of nodes added per node type
+        self._edges_by_key = {}  # Map of (from, to, type) to the edge already added for it
+        self._adjacency = None  # Map of node ID to its (edge end, other node ID) pairs, built on first query
+        self._url_trie = None  # Nested dict of URL pattern segments, built on first resolve_url()
+        self._view_index = []  # (view ID, models used, forms used, serializers used) per view
+        self._view_http_methods = {}  # Map of view name to its declared HTTP methods
+        self._url_http_methods = {}  # Map of id(url) to the HTTP methods resolved for it
+        self._url_patterns = []  # Input sections read once per build_complete_flow
+        self._views = {}
+        self._parsed_files = ()
         
-    def build_complete_flow(self) -> Dict:
+    def build_complete_flow(self, build_sequences: bool = True) -> Dict:
         """Build a complete flow graph with all relationships"""
         
         # Reset
         self.nodes = []
         self.edges = []
+        self.flow_sequences = None
+        self._nodes_by_id = {}
+        self._ids_by_type = {}
+        self._type_counts = Counter()
+        self._edges_by_key = {}
+        self._adjacency = None
+        self._url_trie = None
+        
+        # Read each input section once; parsed files are walked as a tuple of (path, data)
+        self._url_patterns = self.data.get('url_patterns', [])
+        self._views = self.data.get('views', {})
+        self._parsed_files = tuple(self.data.get('parsed_files', {}).items())
+        
+        # Look up each view's ID and usage lists once for the passes below
+        self._view_index = [
+            (
+                self._make_id('view', view_name),
+                view_data.get('models_used', []),
+                view_data.get('forms_used', []),
+                view_data.get('serializers_used', [])
+            )
+            for view_name, view_data in self._views.items()
+        ]
+        self._view_http_methods = {
+            view_name: view_data.get('http_methods')
+            for view_name, view_data in self._views.items()
+        }
+        self._url_http_methods = {}
         
         # Add URL nodes
         self._add_url_nodes()
@@ -29,11 +98,8 @@ class FlowBuilder:
         # Add Form/Serializer nodes
         self._add_form_serializer_nodes()
         
-        # Add Function nodes
-        self._add_function_nodes()
-        
-        # Add Class nodes
-        self._add_class_nodes()
+        # Add Function and Class nodes
+        self._add_code_nodes()
         
         # Connect URLs to Views
         self._connect_urls_to_views()
@@ -44,29 +110,32 @@ class FlowBuilder:
         # Connect Views to Forms/Serializers
         self._connect_views_to_forms()
         
-        # Connect function calls
-        self._connect_function_calls()
+        # Connect function calls, class inheritance and method calls
+        self._connect_code()
         
-        # Connect class inheritance
-        self._connect_class_hierarchy()
-        
-        # Connect method calls
-        self._connect_method_calls()
-        
-        # Build sequences
-        self._build_request_sequences()
-        
-        return {
+        flow = {
             'nodes': self.nodes,
             'edges': self.edges,
-            'sequences': self.flow_sequences,
-            'stats': self._calculate_flow_stats()
         }
+        
+        # Build sequences only for callers that render them
+        if build_sequences:
+            flow['sequences'] = self.get_sequences()
+        
+        flow['stats'] = self._calculate_flow_stats()
+        return flow
+    
+    def get_sequences(self) -> List[Dict]:
+        """Get the request flow sequences, tracing them on first use"""
+        if self.flow_sequences is None:
+            self.flow_sequences = []
+            self._build_request_sequences()
+        return self.flow_sequences
     
     def _add_url_nodes(self):
         """Add URL pattern nodes"""
-        for url in self.data.get('url_patterns', []):
-            self.nodes.append({
+        for url in self._url_patterns:
+            self._add_node({
                 'id': self._make_id('url', url['pattern']),
                 'type': 'url',
                 'label': url['pattern'],
@@ -77,7 +146,7 @@ class FlowBuilder:
     
     def _add_view_nodes(self):
         """Add view nodes (both function and class-based)"""
-        for view_name, view_data in self.data.get('views', {}).items():
+        for view_name, view_data in self._views.items():
             node = {
                 'id': self._make_id('view', view_name),
                 'type': 'view',
@@ -91,12 +160,12 @@ class FlowBuilder:
             if view_data.get('http_methods'):
                 node['http_methods'] = view_data['http_methods']
             
-            self.nodes.append(node)
+            self._add_node(node)
     
     def _add_model_nodes(self):
         """Add model nodes"""
         for model_name, model_data in self.data.get('models', {}).items():
-            self.nodes.append({
+            self._add_node({
                 'id': self._make_id('model', model_name),
                 'type': 'model',
                 'label': model_name,
@@ -108,33 +177,36 @@ class FlowBuilder:
     def _add_form_serializer_nodes(self):
         """Add form and serializer nodes"""
         # Extract from views
-        for view_name, view_data in self.data.get('views', {}).items():
-            for form in view_data.get('forms_used', []):
+        for _, _, forms_used, serializers_used in self._view_index:
+            for form in forms_used:
                 if not self._node_exists('form', form):
-                    self.nodes.append({
+                    self._add_node({
                         'id': self._make_id('form', form),
                         'type': 'form',
                         'label': form,
                         'data': {}
                     })
             
-            for serializer in view_data.get('serializers_used', []):
+            for serializer in serializers_used:
                 if not self._node_exists('serializer', serializer):
-                    self.nodes.append({
+                    self._add_node({
                         'id': self._make_id('serializer', serializer),
                         'type': 'serializer',
                         'label': serializer,
                         'data': {}
                     })
     
-    def _add_function_nodes(self):
-        """Add standalone function nodes"""
-        for file_path, file_data in self.data.get('parsed_files', {}).items():
+    def _add_code_nodes(self):
+        """Add standalone function and class nodes in one pass over the parsed files"""
+        # Function nodes come first, so hold class nodes back until the walk ends
+        class_nodes = []
+        
+        for file_path, file_data in self._parsed_files:
             for func in file_data.get('functions', []):
                 # Only add if not already added as a view
                 func_name = func['name']
                 if not self._node_exists('function', func_name):
-                    self.nodes.append({
+                    self._add_node({
                         'id': self._make_id('function', func_name),
                         'type': 'function',
                         'label': func_name,
@@ -142,38 +214,37 @@ class FlowBuilder:
                         'parameters': [p['name'] for p in func.get('parameters', [])],
                         'data': func
                     })
-    
-    def _add_class_nodes(self):
-        """Add class nodes (non-model, non-view classes)"""
-        for file_path, file_data in self.data.get('parsed_files', {}).items():
+            
             for cls in file_data.get('classes', []):
-                cls_name = cls['name']
-                
                 # Skip if already added as model or view
-                if cls.get('is_django_model') or cls.get('is_django_view'):
-                    continue
-                
-                if not self._node_exists('class', cls_name):
-                    self.nodes.append({
-                        'id': self._make_id('class', cls_name),
-                        'type': 'class',
-                        'label': cls_name,
-                        'file': file_path,
-                        'methods': [m['name'] for m in cls.get('methods', [])],
-                        'base_classes': cls.get('base_classes', []),
-                        'data': cls
-                    })
+                if not (cls.get('is_django_model') or cls.get('is_django_view')):
+                    class_nodes.append((file_path, cls))
+        
+        for file_path, cls in class_nodes:
+            cls_name = cls['name']
+            if not self._node_exists('class', cls_name):
+                self._add_node({
+                    'id': self._make_id('class', cls_name),
+                    'type': 'class',
+                    'label': cls_name,
+                    'file': file_path,
+                    'methods': [m['name'] for m in cls.get('methods', [])],
+                    'base_classes': cls.get('base_classes', []),
+                    'data': cls
+                })
     
     def _connect_urls_to_views(self):
         """Connect URL patterns to their views"""
-        for url in self.data.get('url_patterns', []):
+        view_ids = self._ids_by_type.get('view', {})
+        
+        for url in self._url_patterns:
             view_name = url.get('view_name')
             if view_name:
                 url_id = self._make_id('url', url['pattern'])
-                view_id = self._make_id('view', view_name)
+                view_id = view_ids.get(view_name)
                 
-                if self._node_exists_by_id(view_id):
-                    self.edges.append({
+                if view_id is not None:
+                    self._add_edge({
                         'from': url_id,
                         'to': view_id,
                         'type': 'routes_to',
@@ -183,13 +254,13 @@ class FlowBuilder:
     
     def _connect_views_to_models(self):
         """Connect views to models they use"""
-        for view_name, view_data in self.data.get('views', {}).items():
-            view_id = self._make_id('view', view_name)
-            
-            for model in view_data.get('models_used', []):
-                model_id = self._make_id('model', model)
-                if self._node_exists_by_id(model_id):
-                    self.edges.append({
+        model_ids = self._ids_by_type.get('model', {})
+        
+        for view_id, models_used, _, _ in self._view_index:
+            for model in models_used:
+                model_id = model_ids.get(model)
+                if model_id is not None:
+                    self._add_edge({
                         'from': view_id,
                         'to': model_id,
                         'type': 'uses_model',
@@ -198,88 +269,94 @@ class FlowBuilder:
     
     def _connect_views_to_forms(self):
         """Connect views to forms and serializers"""
-        for view_name, view_data in self.data.get('views', {}).items():
-            view_id = self._make_id('view', view_name)
-            
-            for form in view_data.get('forms_used', []):
-                form_id = self._make_id('form', form)
-                if self._node_exists_by_id(form_id):
-                    self.edges.append({
+        form_ids = self._ids_by_type.get('form', {})
+        serializer_ids = self._ids_by_type.get('serializer', {})
+        
+        for view_id, _, forms_used, serializers_used in self._view_index:
+            for form in forms_used:
+                form_id = form_ids.get(form)
+                if form_id is not None:
+                    self._add_edge({
                         'from': view_id,
                         'to': form_id,
                         'type': 'uses_form',
                         'label': 'uses'
                     })
             
-            for serializer in view_data.get('serializers_used', []):
-                serializer_id = self._make_id('serializer', serializer)
-                if self._node_exists_by_id(serializer_id):
-                    self.edges.append({
+            for serializer in serializers_used:
+                serializer_id = serializer_ids.get(serializer)
+                if serializer_id is not None:
+                    self._add_edge({
                         'from': view_id,
                         'to': serializer_id,
                         'type': 'uses_serializer',
                         'label': 'uses'
                     })
     
-    def _connect_function_calls(self):
-        """Connect function calls"""
-        for file_path, file_data in self.data.get('parsed_files', {}).items():
+    def _connect_code(self):
+        """Connect function calls, class inheritance and model queries in one pass"""
+        function_ids = self._ids_by_type.get('function', {})
+        class_ids = self._ids_by_type.get('class', {})
+        model_ids = self._ids_by_type.get('model', {})
+        
+        # Edges are grouped by type: calls, then inheritance, then queries
+        inherits_edges = []
+        queries_edges = []
+        
+        for file_path, file_data in self._parsed_files:
             for func in file_data.get('functions', []):
                 func_id = self._make_id('function', func['name'])
                 
                 for call in func.get('calls', []):
-                    called_func = call['name'].split('.')[-1]  # Get last part
-                    called_id = self._make_id('function', called_func)
+                    called_func = call['name'].rpartition('.')[2]  # Get last part
+                    called_id = function_ids.get(called_func)
                     
-                    if self._node_exists_by_id(called_id) and func_id != called_id:
-                        self.edges.append({
+                    if called_id is not None and func_id != called_id:
+                        self._add_edge({
                             'from': func_id,
                             'to': called_id,
                             'type': 'calls',
                             'label': 'calls'
                         })
-    
-    def _connect_class_hierarchy(self):
-        """Connect class inheritance relationships"""
-        for file_path, file_data in self.data.get('parsed_files', {}).items():
+            
             for cls in file_data.get('classes', []):
                 cls_id = self._make_id('class', cls['name'])
                 
                 for base_class in cls.get('base_classes', []):
                     # Get just the class name (remove module path)
-                    base_name = base_class.split('.')[-1]
-                    base_id = self._make_id('class', base_name)
+                    base_name = base_class.rpartition('.')[2]
+                    base_id = class_ids.get(base_name)
                     
-                    if self._node_exists_by_id(base_id) and cls_id != base_id:
-                        self.edges.append({
+                    if base_id is not None and cls_id != base_id:
+                        inherits_edges.append({
                             'from': cls_id,
                             'to': base_id,
                             'type': 'inherits',
                             'label': 'inherits from'
                         })
-    
-    def _connect_method_calls(self):
-        """Connect method calls within classes"""
-        for file_path, file_data in self.data.get('parsed_files', {}).items():
-            for cls in file_data.get('classes', []):
-                cls_id = self._make_id('class', cls['name'])
                 
                 for method in cls.get('methods', []):
                     # Track method calls to models
                     for call in method.get('calls', []):
                         # Check if it's a model query
-                        if '.objects.' in call['name']:
-                            model_name = call['name'].split('.')[0]
-                            model_id = self._make_id('model', model_name)
-                            
-                            if self._node_exists_by_id(model_id):
-                                self.edges.append({
-                                    'from': cls_id,
-                                    'to': model_id,
-                                    'type': 'queries',
-                                    'label': 'queries',
-                                    'method': method['name']
-                                })
+                        call_name = call['name']
+                        if '.objects.' not in call_name:
+                            continue
+                        
+                        model_id = model_ids.get(call_name.partition('.')[0])
+                        if model_id is not None:
+                            queries_edges.append({
+                                'from': cls_id,
+                                'to': model_id,
+                                'type': 'queries',
+                                'label': 'queries',
+                                'methods': [method['name']]
+                            })
+        
+        for edge in inherits_edges:
+            self._add_edge(edge)
+        for edge in queries_edges:
+            self._add_edge(edge)
     
     def _build_request_sequences(self):
         """Build typical request flow sequences"""
@@ -337,28 +414,54 @@ class FlowBuilder:
     
     def _extract_http_methods(self, url: Dict) -> List[str]:
         """Extract HTTP methods for a URL"""
-        methods = url.get('methods', [])
-        if not methods:
+        key = id(url)
+        methods = self._url_http_methods.get(key)
+        if methods is None:
             # Try to infer from view
-            view_name = url.get('view_name')
-            if view_name:
-                view_data = self.data.get('views', {}).get(view_name)
-                if view_data:
-                    methods = view_data.get('http_methods', [])
-        return methods or ['GET']
+            methods = url.get('methods') or self._view_http_methods.get(url.get('view_name')) or ['GET']
+            self._url_http_methods[key] = methods
+        return methods
     
     def _make_id(self, node_type: str, name: str) -> str:
         """Create a unique node ID"""
-        return f"{node_type}_{name}".replace('/', '_').replace('.', '_').replace(' ', '_')
+        key = (node_type, name)
+        node_id = self._ids.get(key)
+        if node_id is None:
+            node_id = self._ids[key] = f"{node_type}_{name}".translate(_ID_TRANSLATION)
+        return node_id
+    
+    def _add_node(self, node: Dict):
+        """Append a node and index it by ID"""
+        self.nodes.append(node)
+        self._type_counts[node['type']] += 1
+        if self._nodes_by_id.setdefault(node['id'], node) is node:
+            self._ids_by_type.setdefault(node['type'], {})[node['label']] = node['id']
+    
+    def _add_edge(self, edge: Dict):
+        """Append an edge, folding repeats of the same (from, to, type) into the first one"""
+        key = (edge['from'], edge['to'], edge['type'])
+        existing = self._edges_by_key.get(key)
+        if existing is None:
+            self._edges_by_key[key] = edge
+            self.edges.append(edge)
+            self._adjacency = None
+            return
+        
+        # Keep every distinct method the repeated edges carried; the list may be
+        # shared with the analysis data, so build a new one rather than extend it
+        methods = existing.get('methods')
+        if methods is not None:
+            added = [name for name in edge.get('methods', []) if name not in methods]
+            if added:
+                existing['methods'] = methods + added
     
     def _node_exists(self, node_type: str, name: str) -> bool:
         """Check if a node already exists"""
-        node_id = self._make_id(node_type, name)
-        return any(node['id'] == node_id for node in self.nodes)
+        return self._make_id(node_type, name) in self._nodes_by_id
     
     def _node_exists_by_id(self, node_id: str) -> bool:
         """Check if a node with given ID exists"""
-        return any(node['id'] == node_id for node in self.nodes)
+        return node_id in self._nodes_by_id
     
     def _calculate_flow_stats(self) -> Dict:
         """Calculate statistics about the flow"""
@@ -366,15 +469,10 @@ class FlowBuilder:
         stats = {
             'total_nodes': len(self.nodes),
             'total_edges': len(self.edges),
-            'by_type': {},
+            'by_type': dict(self._type_counts),
             'complexity_score': 0
         }
         
-        # Count nodes by type
-        for node in self.nodes:
-            node_type = node['type']
-            stats['by_type'][node_type] = stats['by_type'].get(node_type, 0) + 1
-        
         # Calculate complexity (rough estimate)
         stats['complexity_score'] = len(self.edges) * 0.5 + len(self.nodes) * 0.3
         
@@ -382,24 +480,75 @@ class FlowBuilder:
     
     def get_node_by_id(self, node_id: str) -> Dict:
         """Get a node by its ID"""
-        for node in self.nodes:
-            if node['id'] == node_id:
-                return node
-        return None
+        return self._nodes_by_id.get(node_id)
+    
+    def resolve_url(self, path: str) -> Optional[Dict]:
+        """Find the URL pattern a request path would hit, preferring the first declared"""
+        if self._url_trie is None:
+            self._build_url_trie()
+        
+        segments = _url_segments(path)
+        best = None
+        
+        # Explore literal and parameter branches; several patterns may match the path
+        stack = [(self._url_trie, 0)]
+        while stack:
+            node, index = stack.pop()
+            
+            if index == len(segments):
+                leaf = node.get(None)
+                if leaf is not None and (best is None or leaf[0] < best[0]):
+                    best = leaf
+                continue
+            
+            rest = node.get(_REST_SEGMENT)
+            if rest is not None and None in rest:
+                leaf = rest[None]
+                if best is None or leaf[0] < best[0]:
+                    best = leaf
+            
+            keys = [segments[index], _PARAM_SEGMENT]
+            if segments[index].isdigit():
+                keys.append(_INT_SEGMENT)
+            
+            for key in keys:
+                child = node.get(key)
+                if child is not None:
+                    stack.append((child, index + 1))
+        
+        return best[1] if best is not None else None
+    
+    def _build_url_trie(self):
+        """Index URL patterns by segment; leaves hold (declaration order, url)"""
+        self._url_trie = {}
+        
+        for order, url in enumerate(self.data.get('url_patterns', [])):
+            node = self._url_trie
+            for segment in _url_segments(url['pattern']):
+                key = _url_segment_key(segment)
+                if key:  # A bare '^' or '$' anchor adds nothing to match
+                    node = node.setdefault(key, {})
+            node.setdefault(None, (order, url))
     
     def get_connected_nodes(self, node_id: str, direction: str = 'both') -> List[Dict]:
         """Get all nodes connected to a given node"""
+        if self._adjacency is None:
+            self._build_adjacency()
+        
         connected = []
         
-        for edge in self.edges:
-            if direction in ['from', 'both'] and edge['from'] == node_id:
-                node = self.get_node_by_id(edge['to'])
-                if node:
-                    connected.append(node)
-            
-            if direction in ['to', 'both'] and edge['to'] == node_id:
-                node = self.get_node_by_id(edge['from'])
+        for edge_end, other_id in self._adjacency.get(node_id, ()):
+            if direction == edge_end or direction == 'both':
+                node = self._nodes_by_id.get(other_id)
                 if node:
                     connected.append(node)
         
-        return connected
\ No newline at end of file
+        return connected
+    
+    def _build_adjacency(self):
+        """Index every edge under both of its endpoints, in edge order"""
+        self._adjacency = {}
+        
+        for edge in self.edges:
+            self._adjacency.setdefault(edge['from'], []).append(('from', edge['to']))
+            self._adjacency.setdefault(edge['to'], []).append(('to', edge['from']))
\ No newline at end of file
@@ -102,6 +102,7 @@ To enable runtime request logging, add the following to your Django settings:
        'LOG_DIR': './django_mapper_logs',
        'EXCLUDE_PATHS': ['/static/', '/media/', '/admin/jsi18n/'],
        'TRACK_QUERIES': True,
+       'QUERY_DETAIL': 'full',  # Or 'count' to log only the number of queries
        'TRACK_FUNCTION_CALLS': True,
    }
 
@@ -155,20 +156,27 @@ def _display_summary(analysis_result, verbose=False):
     """Display analysis summary"""
     stats = analysis_result.get('stats', {})
     
-    click.echo(f"\n{Fore.YELLOW}📊 Analysis Summary:{Style.RESET_ALL}")
-    click.echo(f"  • URLs: {stats.get('total_urls', 0)}")
-    click.echo(f"  • Views: {stats.get('total_views', 0)}")
-    click.echo(f"  • Models: {stats.get('total_models', 0)}")
-    click.echo(f"  • Apps: {stats.get('total_apps', 0)}")
-    click.echo(f"  • Required ENV vars: {stats.get('total_env_vars', 0)}")
+    # Collect the lines and write them in one call
+    lines = [
+        f"\n{Fore.YELLOW}📊 Analysis Summary:{Style.RESET_ALL}",
+        f"  • URLs: {stats.get('total_urls', 0)}",
+        f"  • Views: {stats.get('total_views', 0)}",
+        f"  • Models: {stats.get('total_models', 0)}",
+        f"  • Apps: {stats.get('total_apps', 0)}",
+        f"  • Required ENV vars: {stats.get('total_env_vars', 0)}",
+    ]
     
     # Debug output
     if verbose:
-        click.echo(f"\n{Fore.CYAN}🔍 Debug Info:{Style.RESET_ALL}")
-        click.echo(f"  Views found: {list(analysis_result.get('views', {}).keys())[:5]}...")  # First 5
-        click.echo(f"  Models found: {list(analysis_result.get('models', {}).keys())}")
-        click.echo(f"  URL patterns: {len(analysis_result.get('url_patterns', []))}")
-        click.echo(f"  Apps found: {analysis_result.get('apps', [])}")
+        lines += [
+            f"\n{Fore.CYAN}🔍 Debug Info:{Style.RESET_ALL}",
+            f"  Views found: {list(analysis_result.get('views', {}).keys())[:5]}...",  # First 5
+            f"  Models found: {list(analysis_result.get('models', {}).keys())}",
+            f"  URL patterns: {len(analysis_result.get('url_patterns', []))}",
+            f"  Apps found: {analysis_result.get('apps', [])}",
+        ]
+    
+    click.echo('\n'.join(lines))
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -1,208 +1,202 @@
 import ast
-import re
+import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Set
+
+from django_mapper.analyzers.ast_cache import ASTCache
+from django_mapper.analyzers.project_index import ProjectIndex
+from django_mapper.storage.parse_cache import ParseCache
+from django_mapper.utils.helpers import (
+    PARALLEL_MIN_FILES,
+    dotted_name,
+    file_sha256,
+    mapped_file,
+    process_map,
+    relative_path,
+)
+
+# Field types that link one model to another
+_RELATIONSHIP_FIELDS = frozenset({'ForeignKey', 'OneToOneField', 'ManyToManyField'})
+
+# Appended to a file's path so its models sit beside, not over, its ASTParser entry in the parse cache
+_CACHE_KEY_SUFFIX = '#models'
+
+# Literal extractors keyed by exact node type, used by ModelTracker._extract_value
+_VALUE_EXTRACTORS = {
+    ast.Constant: lambda tracker, node: node.value,
+    ast.Name: lambda tracker, node: node.id,
+    ast.List: lambda tracker, node: [tracker._extract_value(elt) for elt in node.elts],
+    ast.Tuple: lambda tracker, node: tuple(tracker._extract_value(elt) for elt in node.elts),
+}
+
+# Source text for values that are not literals; ast.unparse needs Python 3.9+
+_unparse = getattr(ast, 'unparse', str)
+
+# Nodes whose subtrees can hold a class definition: statements, except clauses and match cases
+_STATEMENT_TYPES = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+
+def _iter_class_defs(tree: ast.Module) -> Iterator[ast.ClassDef]:
+    """Yield every class definition in source order, walking statements and skipping expressions"""
+    stack = list(reversed(tree.body))
+    
+    while stack:
+        node = stack.pop()
+        if type(node) is ast.ClassDef:
+            yield node
+        
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                children.extend(item for item in value if isinstance(item, _STATEMENT_TYPES))
+        
+        # Push in reverse so children are visited first-to-last
+        stack.extend(reversed(children))
+
+def _intern_field_strings(models: Dict) -> Dict:
+    """Re-intern field types and option names in models that arrived through pickle"""
+    intern = sys.intern
+    for model_info in models.values():
+        for field in model_info['fields']:
+            field['type'] = intern(field['type'])
+            field['options'] = {intern(key): value for key, value in field['options'].items()}
+    return models
+
+def _parse_models_worker(project_path: Path, app_dirs: Set[str], file_path: Path) -> Dict:
+    """Extract models from one file in a worker process"""
+    return ModelTracker(project_path, app_dirs=app_dirs)._parse_models_file(file_path)
 
 class ModelTracker:
     """Track Django models in the project"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, ast_cache: ASTCache = None, project_index: ProjectIndex = None,
+                 parse_cache: ParseCache = None, app_dirs: Set[str] = None):
         self.project_path = project_path
+        self.ast_cache = ast_cache or ASTCache()
+        self.project_index = project_index or ProjectIndex(project_path)
+        self.parse_cache = parse_cache
+        self._app_dirs = app_dirs  # Directories holding an apps.py, read from the project index on first use
+        self._app_names = {}  # Map of directory to the app that contains it
         
     def find_models(self) -> Dict:
         """Find all Django models in the project"""
         models = {}
+        index = self.project_index.build()
+        models_files = list(index.models_files)
         
-        # Find all models.py files
-        for models_file in self.project_path.rglob('models.py'):
-            if 'site-packages' in str(models_file) or 'venv' in str(models_file):
+        # Also check for models/ directories
+        for models_dir in index.models_dirs:
+            entries = index.dir_entries.get(models_dir, {})
+            if '__init__.py' not in entries:
                 continue
             
-            file_models = self._parse_models_file(models_file)
-            models.update(file_models)
+            # Check __init__.py for imports, then the individual model files
+            models_files.append(Path(entries['__init__.py'].path))
+            for name, entry in entries.items():
+                if name.endswith('.py') and name != '__init__.py':
+                    models_files.append(Path(entry.path))
+        
+        # Parse across processes only when there are enough files to pay for the pool
+        if len(models_files) < PARALLEL_MIN_FILES:
+            results = [self._parse_models_file(models_file) for models_file in models_files]
+        else:
+            results = self._parse_models_files_parallel(models_files)
         
-        # Also check for models/ directories
-        for models_dir in self.project_path.rglob('models'):
-            if models_dir.is_dir() and (models_dir / '__init__.py').exists():
-                # Check __init__.py for imports
-                init_file = models_dir / '__init__.py'
-                if init_file.exists():
-                    file_models = self._parse_models_file(init_file)
-                    models.update(file_models)
-                
-                # Parse individual model files
-                for py_file in models_dir.glob('*.py'):
-                    if py_file.name != '__init__.py':
-                        file_models = self._parse_models_file(py_file)
-                        models.update(file_models)
+        if self.parse_cache:
+            self.parse_cache.close()
+        
+        for file_models in results:
+            models.update(file_models)
         
         return models
     
-    def _parse_models_file(self, models_file: Path) -> Dict:
-        """Enhanced model parsing with better relationship detection"""
-        models = {}
-        
-        try:
-            content = models_file.read_text(encoding='utf-8')
-            
-            # Find all model classes
-            class_pattern = r'class\s+(\w+)\s*\([^)]*Model[^)]*\):'
-            model_classes = re.finditer(class_pattern, content)
-            
-            for match in model_classes:
-                model_name = match.group(1)
-                if model_name == 'Meta':  # Skip Meta classes
+    def _parse_models_files_parallel(self, models_files: List[Path]) -> List[Dict]:
+        """Serve cache hits here and fan the misses out to worker processes"""
+        results = [None] * len(models_files)
+        misses = []  # (index, file_path, sha) of files that still need parsing
+        
+        for index, models_file in enumerate(models_files):
+            sha = self._content_hash(models_file)
+            if sha is not None:
+                results[index] = self._get_cached_models(models_file, sha)
+                if results[index] is not None:
                     continue
-                    
-                model_info = self._parse_single_model(content, model_name, models_file)
-                if model_info:
-                    models[model_name] = model_info
-                    
-        except Exception as e:
-            print(f"Error parsing models file {models_file}: {e}")
+            misses.append((index, models_file, sha))
         
-        return models
-    
-    def _parse_single_model(self, content: str, model_name: str, file_path: Path) -> Dict:
-        """Parse a single model class with enhanced field and relationship detection"""
+        worker = partial(_parse_models_worker, self.project_path, self._get_app_dirs())
+        parsed_misses = process_map(worker, [models_file for _, models_file, _ in misses])
         
-        # Extract the model class content
-        class_start = content.find(f'class {model_name}')
-        if class_start == -1:
-            return None
-            
-        # Find the end of the class (next class or end of file)
-        next_class = content.find('\nclass ', class_start + 1)
-        if next_class == -1:
-            class_content = content[class_start:]
-        else:
-            class_content = content[class_start:next_class]
+        for (index, models_file, sha), file_models in zip(misses, parsed_misses):
+            results[index] = _intern_field_strings(file_models)
+            if sha is not None:
+                self.parse_cache.put(str(models_file) + _CACHE_KEY_SUFFIX, sha, file_models)
         
-        model_info = {
-            'name': model_name,
-            'file': str(file_path.relative_to(self.project_path)),
-            'app': self._get_app_name(file_path),
-            'fields': [],
-            'methods': [],
-            'relationships': [],
-            'meta': {}
-        }
+        return results
+    
+    def _content_hash(self, file_path: Path) -> Optional[bytes]:
+        """Content hash for the parse cache, or None without a cache or a readable file"""
+        if not self.parse_cache:
+            return None
+        try:
+            return file_sha256(file_path)
+        except (OSError, ValueError):
+            return None  # The parse reports the read error
+    
+    def _get_cached_models(self, file_path: Path, sha: bytes) -> Optional[Dict]:
+        """Models an earlier run found in this exact file content, if any"""
+        models = self.parse_cache.get(str(file_path) + _CACHE_KEY_SUFFIX, sha)
+        if models is None:
+            return None
         
-        # Parse fields
-        field_patterns = [
-            r'(\w+)\s*=\s*models\.(\w+)\s*\([^)]*\)',  # Standard fields
-            r'(\w+)\s*=\s*models\.(\w+)\s*\(\s*([^)]+)\)',  # Fields with options
-        ]
-        
-        for pattern in field_patterns:
-            fields = re.finditer(pattern, class_content)
-            for field_match in fields:
-                field_name = field_match.group(1)
-                field_type = field_match.group(2)
-                
-                field_info = {
-                    'name': field_name,
-                    'type': field_type,
-                    'options': {}
-                }
-                
-                # Parse field options if present
-                if len(field_match.groups()) > 2:
-                    options_str = field_match.group(3)
-                    field_info['options'] = self._parse_field_options(options_str)
-                
-                # Check for relationships
-                if field_type in ['ForeignKey', 'OneToOneField', 'ManyToManyField']:
-                    related_model = self._extract_related_model(field_match.group(0))
-                    if related_model:
-                        field_info['related_model'] = related_model
-                        model_info['relationships'].append({
-                            'field': field_name,
-                            'type': field_type,
-                            'related_model': related_model
-                        })
-                
-                model_info['fields'].append(field_info)
-        
-        # Parse methods
-        method_pattern = r'def\s+(\w+)\s*\(self[^)]*\):'
-        methods = re.findall(method_pattern, class_content)
-        model_info['methods'] = [m for m in methods if not m.startswith('_') or m in ['__str__', '__unicode__']]
-        
-        # Parse Meta class
-        meta_match = re.search(r'class Meta:(.*?)(?=\n    def|\n    \w+\s*=|\nclass|\Z)', class_content, re.DOTALL)
-        if meta_match:
-            meta_content = meta_match.group(1)
-            model_info['meta'] = self._parse_meta_class(meta_content)
-        
-        return model_info
-        
-    def _extract_related_model(self, field_declaration: str) -> str:
-        """Extract related model from field declaration"""
-        # Look for quoted model names
-        quoted_model = re.search(r'[\'"](\w+)[\'"]', field_declaration)
-        if quoted_model:
-            return quoted_model.group(1)
-            
-        # Look for direct model references
-        model_ref = re.search(r'models\.\w+\s*\(\s*(\w+)', field_declaration)
-        if model_ref:
-            return model_ref.group(1)
-            
-        return None
-        
-    def _parse_field_options(self, options_str: str) -> Dict:
-        """Parse field options from string"""
-        options = {}
-        
-        # Common option patterns
-        option_patterns = [
-            (r'max_length\s*=\s*(\d+)', 'max_length', int),
-            (r'null\s*=\s*(True|False)', 'null', lambda x: x == 'True'),
-            (r'blank\s*=\s*(True|False)', 'blank', lambda x: x == 'True'),
-            (r'unique\s*=\s*(True|False)', 'unique', lambda x: x == 'True'),
-            (r'db_index\s*=\s*(True|False)', 'db_index', lambda x: x == 'True'),
-            (r'default\s*=\s*([^,\)]+)', 'default', str),
-            (r'help_text\s*=\s*[\'"]([^\'"]+)[\'"]', 'help_text', str),
-        ]
-        
-        for pattern, key, converter in option_patterns:
-            match = re.search(pattern, options_str)
-            if match:
-                try:
-                    options[key] = converter(match.group(1).strip())
-                except:
-                    options[key] = match.group(1).strip()
-        
-        return options
-
+        # The app comes from the surrounding directories, not the file, so look it up again
+        app_name = self._get_app_name(file_path)
+        for model_info in models.values():
+            model_info['app'] = app_name
+        return _intern_field_strings(models)
+    
     def _parse_models_file(self, file_path: Path) -> Dict:
         """Parse a models file and extract model definitions"""
         models = {}
         
+        # Reuse the result of an earlier run when the content is unchanged
+        sha = self._content_hash(file_path)
+        if sha is not None:
+            cached = self._get_cached_models(file_path, sha)
+            if cached is not None:
+                return cached
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tree = ast.parse(content)
+            # Every model base has 'Model' in its name, so files without it need no parse
+            with mapped_file(file_path) as content:
+                names_model = content.find(b'Model') != -1
+            tree = self.ast_cache.get(file_path)[0] if names_model else None
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
             return models
         
         # Find all class definitions that inherit from models.Model
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
+        if tree is not None:
+            for node in _iter_class_defs(tree):
                 if self._is_model_class(node):
                     model_info = self._extract_model_info(node, file_path)
                     models[model_info['name']] = model_info
         
+        if sha is not None:
+            self.parse_cache.put(str(file_path) + _CACHE_KEY_SUFFIX, sha, models)
+        
         return models
     
     def _is_model_class(self, class_node: ast.ClassDef) -> bool:
         """Check if a class is a Django model"""
         for base in class_node.bases:
-            base_name = self._get_base_class_name(base)
-            if 'Model' in base_name or 'models.Model' in base_name:
-                return True
+            # The leaf name settles the common cases (models.Model, TimeStampedModel)
+            if isinstance(base, ast.Name):
+                if 'Model' in base.id:
+                    return True
+            elif isinstance(base, ast.Attribute):
+                if 'Model' in base.attr or 'Model' in dotted_name(base.value):
+                    return True
         return False
     
     def _extract_model_info(self, class_node: ast.ClassDef, file_path: Path) -> Dict:
@@ -214,21 +208,19 @@ class ModelTracker:
         meta_info = {}
         
         for item in class_node.body:
-            # Extract fields
+            # Extract fields; only calls can declare one
             if isinstance(item, ast.Assign):
+                if not isinstance(item.value, ast.Call):
+                    continue
                 for target in item.targets:
                     if isinstance(target, ast.Name):
                         field_info = self._extract_field_info(target.id, item.value)
                         if field_info:
                             fields.append(field_info)
                             
-                            # Track relationships
-                            if field_info['type'] in ('ForeignKey', 'OneToOneField', 'ManyToManyField'):
-                                relationships.append({
-                                    'field': field_info['name'],
-                                    'type': field_info['type'],
-                                    'related_model': field_info.get('related_model')
-                                })
+                            # Track relationships; the field entry already names its type and target
+                            if field_info['type'] in _RELATIONSHIP_FIELDS:
+                                relationships.append(field_info)
             
             # Extract methods
             elif isinstance(item, ast.FunctionDef):
@@ -241,7 +233,7 @@ class ModelTracker:
         
         return {
             'name': class_node.name,
-            'file': str(file_path.relative_to(self.project_path)),
+            'file': relative_path(file_path, self.project_path),
             'app': self._get_app_name(file_path),
             'fields': fields,
             'methods': methods,
@@ -252,7 +244,7 @@ class ModelTracker:
     def _extract_field_info(self, field_name: str, value_node) -> Dict:
         """Extract field information from assignment"""
         
-        if not isinstance(value_node, ast.Call):
+        if type(value_node) is not ast.Call:
             return None
         
         field_type = self._get_field_type(value_node.func)
@@ -260,19 +252,20 @@ class ModelTracker:
         if not field_type:
             return None
         
+        # Extract field options
+        extract_value = self._extract_value
         field_info = {
             'name': field_name,
             'type': field_type,
-            'options': {}
+            'options': {
+                keyword.arg: extract_value(keyword.value)
+                for keyword in value_node.keywords
+                if keyword.arg
+            }
         }
         
-        # Extract field options
-        for keyword in value_node.keywords:
-            if keyword.arg:
-                field_info['options'][keyword.arg] = self._extract_value(keyword.value)
-        
         # For relationship fields, extract related model
-        if field_type in ('ForeignKey', 'OneToOneField', 'ManyToManyField') and value_node.args:
+        if field_type in _RELATIONSHIP_FIELDS and value_node.args:
             related_model = self._extract_value(value_node.args[0])
             field_info['related_model'] = related_model
         
@@ -280,9 +273,10 @@ class ModelTracker:
     
     def _get_field_type(self, node) -> str:
         """Get the field type from the call node"""
-        if isinstance(node, ast.Attribute):
+        node_type = type(node)
+        if node_type is ast.Attribute:
             return node.attr
-        elif isinstance(node, ast.Name):
+        elif node_type is ast.Name:
             return node.id
         return ''
     
@@ -298,37 +292,45 @@ class ModelTracker:
         
         return meta
     
-    def _get_base_class_name(self, node) -> str:
-        """Get base class name"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            base = self._get_base_class_name(node.value)
-            return f"{base}.{node.attr}"
-        return ''
-    
     def _get_app_name(self, file_path: Path) -> str:
         """Get the app name from file path"""
+        # Files in the same directory always share an app
+        directory = file_path.parent
+        app_name = self._app_names.get(directory)
+        if app_name is not None:
+            return app_name
+        
         # Walk up to find apps.py
-        current = file_path.parent
+        app_dirs = self._get_app_dirs()
+        app_name = 'unknown'
+        current = directory
         while current != self.project_path:
-            if (current / 'apps.py').exists():
-                return current.name
+            if str(current) in app_dirs:
+                app_name = sys.intern(current.name)
+                break
             current = current.parent
-        return 'unknown'
+        
+        self._app_names[directory] = app_name
+        return app_name
+    
+    def _get_app_dirs(self) -> Set[str]:
+        """Get the directories that hold an apps.py, as listed by the project walk"""
+        if self._app_dirs is None:
+            self._app_dirs = {
+                dir_path
+                for dir_path, entries in self.project_index.build().dir_entries.items()
+                if 'apps.py' in entries
+            }
+        return self._app_dirs
     
     def _extract_value(self, node):
         """Extract value from AST node"""
-        if isinstance(node, ast.Constant):
-            return node.value
-        elif isinstance(node, ast.Str):
-            return node.s
-        elif isinstance(node, ast.Num):
-            return node.n
-        elif isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.List):
-            return [self._extract_value(elt) for elt in node.elts]
-        elif isinstance(node, ast.Tuple):
-            return tuple(self._extract_value(elt) for elt in node.elts)
-        return str(node)
\ No newline at end of file
+        extractor = _VALUE_EXTRACTORS.get(type(node))
+        if extractor is not None:
+            return extractor(self, node)
+        
+        # Other literals such as -1 or {'a': 1}; references like models.CASCADE keep their source
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return _unparse(node)
\ No newline at end of file
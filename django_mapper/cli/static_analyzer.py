@@ -1,5 +1,6 @@
 import os
 import ast
+from collections import Counter
 from pathlib import Path
 from typing import Dict, List, Set
 
@@ -7,16 +8,27 @@ from django_mapper.cli.url_mapper import URLMapper
 from django_mapper.cli.model_tracker import ModelTracker
 from django_mapper.cli.view_analyzer import ViewAnalyzer
 from django_mapper.cli.flow_builder import FlowBuilder
+from django_mapper.analyzers.ast_cache import ASTCache
+from django_mapper.analyzers.project_index import ProjectIndex
 from django_mapper.analyzers.env_detector import EnvDetector
 from django_mapper.analyzers.ast_parser import ASTParser
 from django_mapper.analyzers.import_resolver import ImportResolver
+from django_mapper.storage.parse_cache import ParseCache, parse_cache_path
 from django_mapper.utils.config import Config
 from django_mapper.utils.helpers import (
     is_django_project,
     extract_app_name_from_path,
-    calculate_complexity_score
+    calculate_complexity_score,
+    count_lines,
+    relative_path,
 )
 
+# Files and directories whose presence describes a Django app
+APP_MARKER_FILES = frozenset({
+    'models.py', 'models', 'views.py', 'views', 'urls.py',
+    'admin.py', 'forms.py', 'serializers.py',
+})
+
 class StaticAnalyzer:
     """Enhanced static analyzer for Django projects with comprehensive code analysis"""
     
@@ -25,15 +37,25 @@ class StaticAnalyzer:
         self.include_tests = include_tests
         self.config = config or Config()
         
+        # Parsed ASTs and the project file walk, shared by the core analyzers
+        self.ast_cache = ASTCache()
+        self.project_index = ProjectIndex(project_path)
+        
         # Core analyzers
-        self.url_mapper = URLMapper(project_path)
-        self.model_tracker = ModelTracker(project_path)
-        self.view_analyzer = ViewAnalyzer(project_path)
-        self.env_detector = EnvDetector(project_path)
+        self.url_mapper = URLMapper(project_path, ast_cache=self.ast_cache, project_index=self.project_index)
+        self.view_analyzer = ViewAnalyzer(project_path, ast_cache=self.ast_cache, project_index=self.project_index)
+        self.env_detector = EnvDetector(project_path, project_index=self.project_index)
+        
+        # Parse results persisted between runs, outside the project so its files cannot supply them
+        use_cache = self.config.get('analysis', 'use_cache', True)
+        self.parse_cache = ParseCache(parse_cache_path(project_path)) if use_cache else None
+        self.model_tracker = ModelTracker(
+            project_path, ast_cache=self.ast_cache, project_index=self.project_index, parse_cache=self.parse_cache
+        )
         
         # Enhanced analyzers
-        self.ast_parser = ASTParser(project_path)
-        self.import_resolver = ImportResolver(project_path)
+        self.ast_parser = ASTParser(project_path, parse_cache=self.parse_cache, ast_cache=self.ast_cache)
+        self.import_resolver = ImportResolver(project_path, project_index=self.project_index)
         
         # Results storage
         self.parsed_files = {}
@@ -60,7 +82,7 @@ class StaticAnalyzer:
         views = self.view_analyzer.analyze_views(url_patterns)
         
         print("🔧 Detecting environment variables...")
-        env_vars = self.env_detector.detect()
+        env_vars = self.env_detector.detect(self.parsed_files)
         
         print("📦 Resolving imports and dependencies...")
         dependency_graph = self._build_dependency_graph()
@@ -92,55 +114,60 @@ class StaticAnalyzer:
     def _parse_all_project_files(self):
         """Parse all Python files in the project"""
         
-        for py_file in self.project_path.rglob('*.py'):
-            # Use config to check if file should be included
-            if not self.config.is_project_file(py_file, self.project_path):
+        py_files = []
+        for py_file in self.project_index.build().python_files:
+            # Skip test files if not included; the name check is cheaper than the config's
+            if not self.include_tests and 'test' in py_file.name.lower():
                 continue
             
-            # Skip test files if not included
-            if not self.include_tests and 'test' in py_file.name.lower():
+            # Use config to check if file should be included
+            if not self.config.is_project_file(py_file, self.project_path):
                 continue
             
-            # Parse the file
-            parsed = self.ast_parser.parse_file(py_file)
-            if parsed:
-                rel_path = str(py_file.relative_to(self.project_path))
-                self.parsed_files[rel_path] = parsed
+            py_files.append(py_file)
+        
+        # Parse the files, across worker processes for larger projects
+        self.parsed_files.update(self.ast_parser.parse_files(py_files))
+        
+        if self.parse_cache:
+            self.parse_cache.close()
     
     def _find_django_apps(self) -> List[Dict]:
         """Find all Django apps with enhanced metadata"""
         apps = []
         
-        for item in self.project_path.rglob('*'):
-            if item.is_dir() and (item / 'apps.py').exists():
-                # Skip if in excluded directories
-                if not self.config.is_project_file(item, self.project_path):
-                    continue
-                
-                app_name = item.name
-                rel_path = str(item.relative_to(self.project_path))
-                
-                # Count files
-                py_files = list(item.glob('*.py'))
-                total_lines = sum(
-                    len(f.read_text().splitlines()) 
-                    for f in py_files 
-                    if f.is_file()
-                )
-                
-                apps.append({
-                    'name': app_name,
-                    'path': rel_path,
-                    'has_models': (item / 'models.py').exists() or (item / 'models').exists(),
-                    'has_views': (item / 'views.py').exists() or (item / 'views').exists(),
-                    'has_urls': (item / 'urls.py').exists(),
-                    'has_admin': (item / 'admin.py').exists(),
-                    'has_forms': (item / 'forms.py').exists(),
-                    'has_serializers': (item / 'serializers.py').exists(),
-                    'has_tests': any('test' in f.name for f in py_files),
-                    'file_count': len(py_files),
-                    'total_lines': total_lines,
-                })
+        root = str(self.project_path)
+        for dir_path, entries in self.project_index.build().dir_entries.items():
+            if dir_path == root or 'apps.py' not in entries:
+                continue
+            
+            item = Path(dir_path)
+            
+            # Skip if in excluded directories
+            if not self.config.is_project_file(item, self.project_path):
+                continue
+            
+            app_name = item.name
+            rel_path = relative_path(item, self.project_path)
+            present = APP_MARKER_FILES.intersection(entries)
+            
+            # Count files
+            py_files = [entry for name, entry in entries.items() if name.endswith('.py')]
+            total_lines = sum(count_lines(f.path) for f in py_files if f.is_file())
+            
+            apps.append({
+                'name': app_name,
+                'path': rel_path,
+                'has_models': 'models.py' in present or 'models' in present,
+                'has_views': 'views.py' in present or 'views' in present,
+                'has_urls': 'urls.py' in present,
+                'has_admin': 'admin.py' in present,
+                'has_forms': 'forms.py' in present,
+                'has_serializers': 'serializers.py' in present,
+                'has_tests': any('test' in f.name for f in py_files),
+                'file_count': len(py_files),
+                'total_lines': total_lines,
+            })
         
         return apps
     
@@ -220,13 +247,10 @@ class StaticAnalyzer:
         stats['total_functions'] = total_functions
         stats['total_methods'] = total_methods
         
-        # View types
-        stats['function_based_views'] = sum(
-            1 for v in views.values() if v.get('type') == 'function'
-        )
-        stats['class_based_views'] = sum(
-            1 for v in views.values() if v.get('type') == 'class'
-        )
+        # View types, counted in one pass
+        view_types = Counter(v.get('type') for v in views.values())
+        stats['function_based_views'] = view_types['function']
+        stats['class_based_views'] = view_types['class']
         
         # Model relationships
         total_relationships = sum(
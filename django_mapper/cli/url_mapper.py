@@ -3,12 +3,23 @@ import re
 from pathlib import Path
 from typing import List, Dict
 
+from django_mapper.analyzers.ast_cache import ASTCache
+from django_mapper.analyzers.project_index import ProjectIndex
+from django_mapper.utils.helpers import dotted_name
+
+# Callables that declare a single URL pattern
+_URL_FUNCS = frozenset({'path', 're_path', 'url'})
+
 class URLMapper:
     """Extract and map URL patterns from Django URLconf"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, ast_cache: ASTCache = None, project_index: ProjectIndex = None):
         self.project_path = project_path
+        self.ast_cache = ast_cache or ASTCache()
+        self.project_index = project_index or ProjectIndex(project_path)
         self.url_patterns = []
+        self._urlconf_entries = {}  # Map of urlconf path to its prefix-free patterns and includes
+        self._include_paths = {}  # Map of included module to its urls file, or None
         
     def extract_urls(self, root_urlconf: str = None) -> List[Dict]:
         """Extract all URL patterns from the project"""
@@ -25,11 +36,10 @@ class URLMapper:
         self._parse_urlconf(root_urlconf_path, '')
         
         # Also scan for all urls.py files in the project
-        for urls_file in self.project_path.rglob('*urls.py'):
-            if 'site-packages' not in str(urls_file) and 'venv' not in str(urls_file):
-                if urls_file != root_urlconf_path:
-                    # Parse each urls.py
-                    self._parse_urlconf(urls_file, '')
+        for urls_file in self.project_index.build().urls_files:
+            if urls_file != root_urlconf_path:
+                # Parse each urls.py
+                self._parse_urlconf(urls_file, '')
         
         # Post-process to deduplicate and add view types
         unique_patterns = {}
@@ -43,33 +53,53 @@ class URLMapper:
     def _find_root_urlconf(self) -> Path:
         """Find the root urls.py file"""
         
-        # Look for urls.py in common locations
-        candidates = list(self.project_path.rglob('urls.py'))
+        index = self.project_index.build()
+        
+        # Search outwards from the root; settings usually lives near the top
+        candidates = sorted(
+            (path for path in index.urls_files if path.name == 'urls.py'),
+            key=lambda path: len(path.parts),
+        )
         
-        # Filter to find the root one (usually in a directory with settings.py)
+        # The root one usually sits in a directory with settings.py
         for candidate in candidates:
-            parent_dir = candidate.parent
-            if (parent_dir / 'settings.py').exists() or (parent_dir / 'settings').exists():
+            siblings = index.dir_entries.get(str(candidate.parent), {})
+            if 'settings.py' in siblings or 'settings' in siblings:
                 return candidate
         
-        # Return first urls.py found as fallback
+        # Return the shallowest urls.py found as fallback
         return candidates[0] if candidates else None
     
     def _parse_urlconf(self, urlconf_path: Path, prefix: str = '') -> None:
         """Enhanced URL parsing with DRF router support"""
-        try:
-            content = urlconf_path.read_text(encoding='utf-8')
-            
-            # Parse Django URL patterns
-            self._parse_django_patterns(content, prefix)
-            
-            # Parse DRF Router patterns
-            self._parse_drf_routers(content, prefix, urlconf_path)  # Pass urlconf_path here
+        entries = self._urlconf_entries.get(urlconf_path)
+        
+        if entries is None:
+            try:
+                content = urlconf_path.read_text(encoding='utf-8')
+                entries = []
+                
+                # Parse Django URL patterns
+                self._parse_django_patterns(content, entries)
+                
+                # Parse DRF Router patterns
+                self._parse_drf_routers(content, entries, urlconf_path)  # Pass urlconf_path here
+                
+            except Exception as e:
+                print(f"Error parsing {urlconf_path}: {e}")
+                return
             
-        except Exception as e:
-            print(f"Error parsing {urlconf_path}: {e}")
+            self._urlconf_entries[urlconf_path] = entries
+        
+        # Replay the file's entries under this prefix
+        for entry in entries:
+            if isinstance(entry, tuple):
+                url_prefix, include_path = entry
+                self._parse_urlconf(include_path, prefix + url_prefix)
+            else:
+                self.url_patterns.append(dict(entry, pattern=prefix + entry['pattern']))
     
-    def _parse_django_patterns(self, content: str, prefix: str) -> None:
+    def _parse_django_patterns(self, content: str, entries: List) -> None:
         """Parse standard Django URL patterns"""
         
         # Find include patterns (these reference other URL files)
@@ -77,14 +107,9 @@ class URLMapper:
         include_matches = re.findall(include_pattern, content)
         
         for url_prefix, include_module in include_matches:
-            # Find the included URLs file
-            include_path = self.project_path
-            for part in include_module.split('.'):
-                include_path = include_path / part
-            include_path = include_path.with_suffix('.py')
-            
-            if include_path.exists():
-                self._parse_urlconf(include_path, prefix + url_prefix)
+            include_path = self._find_include_file(include_module)
+            if include_path:
+                entries.append((url_prefix, include_path))
         
         # Find direct path patterns
         pattern_matches = re.finditer(r'path\([\'"]([^\'"]*)[\'"],\s*([^,\)]+)', content)
@@ -107,22 +132,37 @@ class URLMapper:
             elif 'ViewSet' in view_ref:
                 view_type = 'viewset'
             
-            full_pattern = f"{prefix}{url_pattern}"
-            
-            self.url_patterns.append({
-                'pattern': full_pattern,
+            entries.append({
+                'pattern': url_pattern,
                 'view_name': view_name,
                 'view_type': view_type,
                 'name': self._extract_url_name(match.group(0)),
                 'methods': ['GET', 'POST', 'PUT', 'DELETE'],  # Default for ViewSets
             })
     
+    def _find_include_file(self, include_module: str) -> Path:
+        """Find the URLs file for an included module, remembering the answer"""
+        if include_module in self._include_paths:
+            return self._include_paths[include_module]
+        
+        # Find the included URLs file
+        include_path = self.project_path
+        for part in include_module.split('.'):
+            include_path = include_path / part
+        include_path = include_path.with_suffix('.py')
+        
+        if not include_path.exists():
+            include_path = None
+        
+        self._include_paths[include_module] = include_path
+        return include_path
+    
     def _extract_url_name(self, pattern_str: str) -> str:
         """Extract URL name from pattern string"""
         name_match = re.search(r'name=[\'"]([^\'"]+)[\'"]', pattern_str)
         return name_match.group(1) if name_match else ''
     
-    def _parse_drf_routers(self, content: str, prefix: str, url_file: Path) -> None:  # Change parameter name
+    def _parse_drf_routers(self, content: str, entries: List, url_file: Path) -> None:  # Change parameter name
         """Parse Django REST Framework router patterns"""
         
         # Find router creation
@@ -136,7 +176,7 @@ class URLMapper:
             
             for reg in registrations:
                 url_prefix, viewset_name, basename = reg
-                full_prefix = f"{prefix}{url_prefix}/"
+                full_prefix = f"{url_prefix}/"
                 
                 # Generate standard ViewSet URLs
                 viewset_urls = [
@@ -183,24 +223,27 @@ class URLMapper:
                     print(f"Error parsing ViewSet {viewset_name}: {e}")
                     pass  # Continue without custom actions
                 
-                self.url_patterns.extend(viewset_urls)
+                entries.extend(viewset_urls)
     
     def _find_viewset_file(self, viewset_name: str, url_file: Path) -> Path:  # Change parameter name
         """Find the file containing the ViewSet"""
+        dir_entries = self.project_index.build().dir_entries
+        
         # Look in the same directory first
         views_file = url_file.parent / 'views.py'  # Use url_file instead
-        if views_file.exists():
-            content = views_file.read_text(encoding='utf-8')
-            if f'class {viewset_name}' in content:
+        if 'views.py' in dir_entries.get(str(url_file.parent), {}):
+            _, top_defs = self.ast_cache.get(views_file)
+            if viewset_name in top_defs:
                 return views_file
         
-        # Look for views directory
+        # Look for views directory, listed by the project walk
         views_dir = url_file.parent / 'views'  # Use url_file instead
-        if views_dir.is_dir():
-            for py_file in views_dir.glob('*.py'):
+        for name, entry in dir_entries.get(str(views_dir), {}).items():
+            if name.endswith('.py') and entry.is_file():
+                py_file = Path(entry.path)
                 try:
-                    content = py_file.read_text(encoding='utf-8')
-                    if f'class {viewset_name}' in content:
+                    _, top_defs = self.ast_cache.get(py_file)
+                    if viewset_name in top_defs:
                         return py_file
                 except:
                     continue
@@ -235,7 +278,7 @@ class URLMapper:
             if isinstance(element, ast.Call):
                 func_name = self._get_function_name(element.func)
                 
-                if func_name in ('path', 're_path', 'url'):
+                if func_name in _URL_FUNCS:
                     self._extract_single_pattern(element, prefix, base_path)
                 elif func_name == 'include':
                     self._extract_include_pattern(element, prefix, base_path)
@@ -306,9 +349,10 @@ class URLMapper:
             return {}
         
         view_node = call_node.args[1]
+        node_type = type(view_node)
         
         # Check if it's a direct function reference
-        if isinstance(view_node, ast.Name):
+        if node_type is ast.Name:
             return {
                 'name': view_node.id,
                 'type': 'function',
@@ -316,8 +360,8 @@ class URLMapper:
             }
         
         # Check if it's an attribute (module.view)
-        if isinstance(view_node, ast.Attribute):
-            module = self._get_attribute_path(view_node.value)
+        if node_type is ast.Attribute:
+            module = dotted_name(view_node.value)
             return {
                 'name': f"{module}.{view_node.attr}",
                 'type': 'function',
@@ -325,9 +369,9 @@ class URLMapper:
             }
         
         # Check if it's a .as_view() call (class-based view)
-        if isinstance(view_node, ast.Call):
-            if isinstance(view_node.func, ast.Attribute) and view_node.func.attr == 'as_view':
-                view_class = self._get_attribute_path(view_node.func.value)
+        if node_type is ast.Call:
+            if type(view_node.func) is ast.Attribute and view_node.func.attr == 'as_view':
+                view_class = dotted_name(view_node.func.value)
                 return {
                     'name': view_class,
                     'type': 'class',
@@ -362,19 +406,8 @@ class URLMapper:
             return node.attr
         return ''
     
-    def _get_attribute_path(self, node) -> str:
-        """Get full attribute path (e.g., views.MyView)"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            base = self._get_attribute_path(node.value)
-            return f"{base}.{node.attr}"
-        return ''
-    
     def _extract_string_value(self, node) -> str:
         """Extract string value from AST node"""
-        if isinstance(node, ast.Constant):
+        if type(node) is ast.Constant:
             return str(node.value) if node.value else ''
-        elif isinstance(node, ast.Str):  # Python 3.7 compatibility
-            return node.s
         return ''
\ No newline at end of file
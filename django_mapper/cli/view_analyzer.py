@@ -1,39 +1,167 @@
 import ast
+import os
 import re
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from django_mapper.analyzers.ast_cache import ASTCache, VIEW_FILE_SUFFIXES
+from django_mapper.analyzers.project_index import ProjectIndex
+from django_mapper.utils.helpers import dotted_name, relative_path, walk_ast
+
+# Method names a class-based view dispatches HTTP verbs to
+_HTTP_METHODS = frozenset({'get', 'post', 'put', 'patch', 'delete', 'head', 'options'})
+
+# Class-view methods, including async handlers
+_METHOD_NODE_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# Bare form base classes that are not project forms
+_BASE_FORM_NAMES = frozenset({'Form', 'forms.Form'})
+
+# Decorator name builders keyed by exact node type, used by ViewAnalyzer._get_decorator_name
+_DECORATOR_NAMERS = {
+    ast.Name: lambda analyzer, node: node.id,
+    ast.Call: lambda analyzer, node: analyzer._get_call_name(node),
+    ast.Attribute: lambda analyzer, node: dotted_name(node),
+}
+
+class _ViewBodyScanner(ast.NodeVisitor):
+    """Collect models, forms, serializers and returns from a view in one traversal"""
+    
+    def __init__(self, get_call_name):
+        self.get_call_name = get_call_name
+        self.models = set()
+        self.forms = set()
+        self.serializers = set()
+        self.returns_response = False
+    
+    def visit_Attribute(self, node):
+        # Look for Model.objects patterns
+        if node.attr == 'objects' and isinstance(node.value, ast.Name):
+            self.models.add(node.value.id)
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        func_name = self.get_call_name(node)
+        
+        # Look for get_object_or_404, get_list_or_404
+        if 'get_object_or_404' in func_name or 'get_list_or_404' in func_name:
+            if node.args and isinstance(node.args[0], ast.Name):
+                self.models.add(node.args[0].id)
+        
+        if 'Form' in func_name and func_name not in _BASE_FORM_NAMES:
+            self.forms.add(func_name)
+        
+        if 'Serializer' in func_name:
+            self.serializers.add(func_name)
+        
+        self.generic_visit(node)
+    
+    def visit_Return(self, node):
+        if node.value:
+            self.returns_response = True
+        self.generic_visit(node)
 
 class ViewAnalyzer:
     """Analyze Django views and their dependencies"""
     
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, ast_cache: ASTCache = None, project_index: ProjectIndex = None):
         self.project_path = project_path
-        
-    def _view_in_file(self, view_file: Path, view_name: str) -> bool:
-        """Check if view exists in file"""
-        try:
-            content = view_file.read_text(encoding='utf-8')
+        self.ast_cache = ast_cache or ASTCache()
+        self.project_index = project_index or ProjectIndex(project_path)
+        self._view_index = None  # Map of view name to [(file, node, tree), ...]
+        self._view_index_by_qualname = {}  # Map of module.Name to (file, node, tree)
+        self._imports_by_file = {}  # Map of view file to its extracted imports
+    
+    def _build_view_index(self):
+        """Parse every view module once and index its top-level definitions"""
+        self._view_index = {}
+        self._view_index_by_qualname = {}
+        self._imports_by_file = {}
+        
+        for view_file in self._collect_view_files():
+            try:
+                tree, top_defs = self.ast_cache.get(view_file)
+            except Exception:
+                continue
             
-            # Check for class-based views and ViewSets
-            class_patterns = [
-                rf'class\s+{view_name}\s*\(',  # Direct class name
-                rf'class\s+{view_name}ViewSet\s*\(',  # ViewSet pattern
-                rf'class\s+{view_name}View\s*\(',  # View pattern
-            ]
+            module = self._file_to_module(view_file)
+            for name, node in top_defs.items():
+                entry = (view_file, node, tree)
+                self._view_index.setdefault(name, []).append(entry)
+                self._view_index_by_qualname[f"{module}.{name}"] = entry
+    
+    def _collect_view_files(self) -> List[Path]:
+        """Find all files that may define views, in lookup priority order"""
+        by_suffix = {suffix: [] for suffix in VIEW_FILE_SUFFIXES}
+        in_views_dirs = []
+        
+        for entry in self.project_index.build().files:
+            if not entry.name.endswith('.py'):
+                continue
             
-            for pattern in class_patterns:
-                if re.search(pattern, content):
-                    return True
-                    
-            # Check for function-based views
-            func_pattern = rf'def\s+{view_name}\s*\('
-            if re.search(func_pattern, content):
-                return True
-                
-            return False
+            # views.py, handlers.py, viewsets.py, api.py, etc.
+            for suffix in VIEW_FILE_SUFFIXES:
+                if entry.name.endswith(suffix):
+                    by_suffix[suffix].append(entry.path)
+                    break
             
-        except Exception:
-            return False
+            # Any module inside a views/ package
+            if os.path.basename(os.path.dirname(entry.path)) == 'views':
+                in_views_dirs.append(entry.path)
+        
+        ordered = [path for suffix in VIEW_FILE_SUFFIXES for path in by_suffix[suffix]]
+        ordered.extend(in_views_dirs)
+        return [Path(path) for path in dict.fromkeys(ordered)]
+    
+    def _file_to_module(self, file_path: Path) -> str:
+        """Convert file path to dotted module name"""
+        rel_path = file_path.relative_to(self.project_path)
+        if rel_path.name == '__init__.py':
+            return '.'.join(rel_path.parent.parts)
+        return '.'.join(rel_path.with_suffix('').parts)
+    
+    def _lookup_view(self, view_name: str, module_hint: str = None) -> Optional[Tuple[Path, ast.AST, ast.Module]]:
+        """Look up a view definition in the index"""
+        
+        if self._view_index is None:
+            self._build_view_index()
+        
+        # Extract just the view name if it includes module path
+        if '.' in view_name:
+            parts = view_name.split('.')
+            view_name = parts[-1]
+            if not module_hint:
+                module_hint = '.'.join(parts[:-1])
+        
+        if module_hint:
+            entry = self._view_index_by_qualname.get(f"{module_hint}.{view_name}")
+            if entry:
+                return entry
+        
+        # Direct name, then the ViewSet/View naming conventions
+        for name in (view_name, f"{view_name}ViewSet", f"{view_name}View"):
+            candidates = self._view_index.get(name)
+            if candidates:
+                return self._pick_candidate(candidates, module_hint)
+        
+        return None
+    
+    def _pick_candidate(self, candidates: List[Tuple], module_hint: str = None) -> Tuple:
+        """Use the module hint to choose between views that share a name"""
+        if len(candidates) == 1 or not module_hint:
+            return candidates[0]
+        
+        for candidate in candidates:
+            module = self._file_to_module(candidate[0])
+            if module == module_hint or module.endswith(f".{module_hint}"):
+                return candidate
+        
+        hint_parts = module_hint.split('.')
+        for candidate in candidates:
+            if hint_parts[-1] in self._file_to_module(candidate[0]).split('.'):
+                return candidate
+        
+        return candidates[0]
 
     def analyze_views(self, url_patterns: List[Dict]) -> Dict:
         """Enhanced view analysis with better DRF support"""
@@ -58,7 +186,7 @@ class ViewAnalyzer:
             view_info = {
                 'name': view_name,
                 'found': view_file is not None,
-                'file': str(view_file.relative_to(self.project_path)) if view_file else None,
+                'file': relative_path(view_file, self.project_path) if view_file else None,
                 'type': url_pattern.get('view_type', 'unknown'),
                 'http_methods': url_pattern.get('methods', []),
                 'models_used': [],
@@ -133,6 +261,9 @@ class ViewAnalyzer:
         """Analyze all views referenced in URL patterns"""
         views = {}
         
+        # Parse each view module once up front
+        self._build_view_index()
+        
         for url in url_patterns:
             view_name = url.get('view_name')
             if not view_name:
@@ -148,124 +279,81 @@ class ViewAnalyzer:
     def _find_and_analyze_view(self, view_name: str, module_hint: str = None) -> Dict:
         """Find and analyze a specific view"""
         
-        # Try to find the view file
-        view_file = self._find_view_file(view_name, module_hint)
+        entry = self._lookup_view(view_name, module_hint)
         
-        if not view_file:
+        if not entry:
             return {
                 'name': view_name,
                 'found': False,
                 'file': None
             }
         
-        # Parse the view file
-        try:
-            with open(view_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tree = ast.parse(content)
-        except Exception as e:
-            return {
-                'name': view_name,
-                'found': False,
-                'error': str(e)
-            }
-        
-        # Find the view definition
-        view_node = self._find_view_definition(tree, view_name)
-        
-        if not view_node:
-            return {
-                'name': view_name,
-                'found': False,
-                'file': str(view_file)
-            }
-        
         # Analyze the view
+        view_file, view_node, tree = entry
         return self._analyze_view_node(view_node, view_file, tree)
     
     def _find_view_file(self, view_name: str, module_hint: str = None) -> Path:
         """Find the file containing the view"""
-        
-        # Extract just the view name if it includes module path
-        if '.' in view_name:
-            parts = view_name.split('.')
-            view_name = parts[-1]
-            if not module_hint:
-                module_hint = '.'.join(parts[:-1])
-        
-        # Search patterns - views.py, handlers.py, viewsets.py, etc.
-        view_file_patterns = ['*views.py', '*handlers.py', '*viewsets.py', '*api.py']
-        
-        for pattern in view_file_patterns:
-            for views_file in self.project_path.rglob(pattern):
-                # Skip if in venv or site-packages
-                if 'site-packages' in str(views_file) or 'venv' in str(views_file):
-                    continue
-                
-                # Check if view is in this file
-                if self._view_in_file(views_file, view_name):
-                    return views_file
-        
-        # Also check views/ directories
-        for views_dir in self.project_path.rglob('views'):
-            if views_dir.is_dir():
-                for py_file in views_dir.glob('*.py'):
-                    if self._view_in_file(py_file, view_name):
-                        return py_file
-        
-        return None
-    
-    def _find_view_definition(self, tree, view_name: str):
-        """Find the view definition in AST"""
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                if node.name == view_name:
-                    return node
-        return None
+        entry = self._lookup_view(view_name, module_hint)
+        return entry[0] if entry else None
     
     def _analyze_view_node(self, view_node, view_file: Path, tree) -> Dict:
         """Analyze a view function or class"""
         
         is_class = isinstance(view_node, ast.ClassDef)
         
+        # Imports are shared by every view in the file, so extract them once
+        imports = self._imports_by_file.get(view_file)
+        if imports is None:
+            imports = self._imports_by_file[view_file] = self._extract_imports(tree)
+        
         view_info = {
             'name': view_node.name,
             'found': True,
-            'file': str(view_file.relative_to(self.project_path)),
+            'file': relative_path(view_file, self.project_path),
             'type': 'class' if is_class else 'function',
             'line_number': view_node.lineno,
             'models_used': [],
             'forms_used': [],
             'serializers_used': [],
             'decorators': [],
-            'imports': self._extract_imports(tree),
+            'imports': imports,
         }
         
         # Extract decorators
-        if hasattr(view_node, 'decorator_list'):
-            for decorator in view_node.decorator_list:
-                dec_name = self._get_decorator_name(decorator)
-                view_info['decorators'].append(dec_name)
+        for decorator in view_node.decorator_list:
+            view_info['decorators'].append(self._get_decorator_name(decorator))
+        
+        # Detect models, forms, serializers used in a single traversal
+        scanner = self._scan_view_body(view_node)
         
         # Analyze view body
         if is_class:
             view_info.update(self._analyze_class_view(view_node))
         else:
-            view_info.update(self._analyze_function_view(view_node))
+            view_info.update(self._analyze_function_view(view_node, scanner))
         
-        # Detect models, forms, serializers used
-        view_info['models_used'] = self._detect_models_used(view_node)
-        view_info['forms_used'] = self._detect_forms_used(view_node)
-        view_info['serializers_used'] = self._detect_serializers_used(view_node)
+        view_info['models_used'] = list(scanner.models)
+        view_info['forms_used'] = list(scanner.forms)
+        view_info['serializers_used'] = list(scanner.serializers)
         
         return view_info
     
-    def _analyze_function_view(self, func_node: ast.FunctionDef) -> Dict:
+    def _scan_view_body(self, node) -> _ViewBodyScanner:
+        """Walk a view once and collect everything the analysis needs"""
+        scanner = _ViewBodyScanner(self._get_call_name)
+        scanner.visit(node)
+        return scanner
+    
+    def _analyze_function_view(self, func_node: ast.FunctionDef, scanner: _ViewBodyScanner = None) -> Dict:
         """Analyze a function-based view"""
         
+        if scanner is None:
+            scanner = self._scan_view_body(func_node)
+        
         info = {
             'parameters': [arg.arg for arg in func_node.args.args],
-            'returns_response': self._checks_for_response(func_node),
+            'returns_response': scanner.returns_response,
         }
         
         return info
@@ -277,68 +365,36 @@ class ViewAnalyzer:
         http_methods = []
         
         for item in class_node.body:
-            if isinstance(item, ast.FunctionDef):
+            if isinstance(item, _METHOD_NODE_TYPES):
                 methods.append(item.name)
                 
                 # Track HTTP methods
-                if item.name in ('get', 'post', 'put', 'patch', 'delete', 'head', 'options'):
+                if item.name in _HTTP_METHODS:
                     http_methods.append(item.name.upper())
         
         return {
             'methods': methods,
             'http_methods': http_methods,
-            'base_classes': [self._get_base_name(base) for base in class_node.bases],
+            'base_classes': [dotted_name(base) for base in class_node.bases],
         }
     
     def _detect_models_used(self, node) -> List[str]:
         """Detect which models are used in the view"""
-        models = set()
-        
-        for child in ast.walk(node):
-            # Look for Model.objects patterns
-            if isinstance(child, ast.Attribute):
-                if child.attr == 'objects':
-                    if isinstance(child.value, ast.Name):
-                        models.add(child.value.id)
-            
-            # Look for get_object_or_404, get_list_or_404
-            if isinstance(child, ast.Call):
-                func_name = self._get_call_name(child)
-                if 'get_object_or_404' in func_name or 'get_list_or_404' in func_name:
-                    if child.args and isinstance(child.args[0], ast.Name):
-                        models.add(child.args[0].id)
-        
-        return list(models)
+        return list(self._scan_view_body(node).models)
     
     def _detect_forms_used(self, node) -> List[str]:
         """Detect which forms are used in the view"""
-        forms = set()
-        
-        for child in ast.walk(node):
-            if isinstance(child, ast.Call):
-                func_name = self._get_call_name(child)
-                if 'Form' in func_name and func_name not in ('Form', 'forms.Form'):
-                    forms.add(func_name)
-        
-        return list(forms)
+        return list(self._scan_view_body(node).forms)
     
     def _detect_serializers_used(self, node) -> List[str]:
         """Detect which serializers are used (for DRF)"""
-        serializers = set()
-        
-        for child in ast.walk(node):
-            if isinstance(child, ast.Call):
-                func_name = self._get_call_name(child)
-                if 'Serializer' in func_name:
-                    serializers.add(func_name)
-        
-        return list(serializers)
+        return list(self._scan_view_body(node).serializers)
     
     def _extract_imports(self, tree) -> List[Dict]:
         """Extract import statements"""
         imports = []
         
-        for node in ast.walk(tree):
+        for node in walk_ast(tree):
             if isinstance(node, ast.Import):
                 for alias in node.names:
                     imports.append({
@@ -356,34 +412,15 @@ class ViewAnalyzer:
     
     def _checks_for_response(self, func_node) -> bool:
         """Check if function returns a response"""
-        for node in ast.walk(func_node):
-            if isinstance(node, ast.Return) and node.value:
-                return True
-        return False
+        return self._scan_view_body(func_node).returns_response
     
     def _get_decorator_name(self, decorator) -> str:
         """Get decorator name"""
-        if isinstance(decorator, ast.Name):
-            return decorator.id
-        elif isinstance(decorator, ast.Call):
-            return self._get_call_name(decorator)
-        elif isinstance(decorator, ast.Attribute):
-            return f"{self._get_base_name(decorator.value)}.{decorator.attr}"
-        return str(decorator)
-    
-    def _get_base_name(self, node) -> str:
-        """Get base class or attribute name"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            base = self._get_base_name(node.value)
-            return f"{base}.{node.attr}"
-        return ''
+        namer = _DECORATOR_NAMERS.get(type(decorator))
+        if namer is None:
+            return str(decorator)
+        return namer(self, decorator)
     
     def _get_call_name(self, call_node) -> str:
         """Get function call name"""
-        if isinstance(call_node.func, ast.Name):
-            return call_node.func.id
-        elif isinstance(call_node.func, ast.Attribute):
-            return f"{self._get_base_name(call_node.func.value)}.{call_node.func.attr}"
-        return ''
\ No newline at end of file
+        return dotted_name(call_node.func)
\ No newline at end of file
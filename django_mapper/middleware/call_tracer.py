@@ -1,7 +1,27 @@
+import os
 import sys
 import functools
 from pathlib import Path
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+
+# Keys of each recorded call, matching the (file, function, line) tuples built while tracing
+CALL_FIELDS = ('file', 'function', 'line')
+
+# DJANGO_MAPPER settings and project root, resolved once for every middleware instance
+_CONFIG = getattr(settings, 'DJANGO_MAPPER', {})
+_PROJECT_PATH = Path(settings.BASE_DIR) if hasattr(settings, 'BASE_DIR') else None
+
+def _reload_settings(setting, **kwargs):
+    """Re-resolve the module-level settings when they are overridden (e.g. in tests)"""
+    global _CONFIG, _PROJECT_PATH
+    if setting == 'DJANGO_MAPPER':
+        _CONFIG = getattr(settings, 'DJANGO_MAPPER', {})
+    elif setting == 'BASE_DIR':
+        _PROJECT_PATH = Path(settings.BASE_DIR) if hasattr(settings, 'BASE_DIR') else None
+
+setting_changed.connect(_reload_settings)
 
 class CallTracerMiddleware:
     """
@@ -11,62 +31,64 @@ class CallTracerMiddleware:
     
     def __init__(self, get_response):
         self.get_response = get_response
-        self.config = getattr(settings, 'DJANGO_MAPPER', {})
+        self.config = _CONFIG
         self.enabled = self.config.get('TRACK_FUNCTION_CALLS', False) and self.config.get('ENABLED', False)
         self.call_stack = []
-        self.project_path = Path(settings.BASE_DIR) if hasattr(settings, 'BASE_DIR') else None
-    
-    def __call__(self, request):
+        self.project_path = _PROJECT_PATH
+        
+        # Drop out of the middleware chain entirely when there is nothing to trace
         if not self.enabled or not self.project_path:
-            return self.get_response(request)
+            raise MiddlewareNotUsed()
         
-        # Clear call stack for new request
+        self._prefix = str(self.project_path) + os.sep
+        self._prefix_len = len(self._prefix)
+        self._traced_files = {}  # Map of filename to its relative path, or None if not traced
+    
+    def __call__(self, request):
+        # Clear call stack for new request, binding its append once for the callback
         self.call_stack = []
+        self._record_call = self.call_stack.append
         
-        # Set up tracing
-        old_trace = sys.gettrace()
-        sys.settrace(self.trace_calls)
+        # Set up profiling; unlike settrace it is not invoked for every line
+        old_profile = sys.getprofile()
+        sys.setprofile(self.trace_calls)
         
         try:
             response = self.get_response(request)
         finally:
-            # Restore old trace function
-            sys.settrace(old_trace)
+            # Restore old profile function
+            sys.setprofile(old_profile)
         
         # Store call stack (you could log this to a file)
         # For now, we just attach it to the request for potential use
-        request.call_trace = self.call_stack
+        request.call_trace = [dict(zip(CALL_FIELDS, call)) for call in self.call_stack]
         
         return response
     
     def trace_calls(self, frame, event, arg):
         """Trace function calls"""
+        # Returns and C calls carry no project frame of their own
         if event != 'call':
             return
         
-        # Get function info
+        # Only trace project files, not stdlib or site-packages
         code = frame.f_code
         filename = code.co_filename
-        function_name = code.co_name
-        line_number = frame.f_lineno
-        
-        # Only trace project files, not stdlib or site-packages
-        if not self._should_trace(filename):
-            return
-        
-        # Record the call
         try:
-            relative_path = Path(filename).relative_to(self.project_path)
-        except ValueError:
-            relative_path = filename
-        
-        self.call_stack.append({
-            'file': str(relative_path),
-            'function': function_name,
-            'line': line_number,
-        })
+            relative_path = self._traced_files[filename]
+        except KeyError:
+            relative_path = self._traced_files[filename] = self._relative_trace_path(filename)
+        if relative_path is None:
+            return
         
-        return self.trace_calls
+        # Record the call as a tuple; dicts are only built once the request is done
+        self._record_call((relative_path, code.co_name, frame.f_lineno))
+    
+    def _relative_trace_path(self, filename: str):
+        """Get the path to record for calls in this file, or None to skip it"""
+        if not self._should_trace(filename):
+            return None
+        return filename[self._prefix_len:]
     
     def _should_trace(self, filename: str) -> bool:
         """Determine if we should trace calls in this file"""
@@ -79,16 +101,5 @@ class CallTracerMiddleware:
         if 'site-packages' in filename:
             return False
         
-        # Skip Django internals (unless in our project)
-        if '/django/' in filename and self.project_path and str(self.project_path) not in filename:
-            return False
-        
-        # Only trace if file is in our project
-        if self.project_path:
-            try:
-                Path(filename).relative_to(self.project_path)
-                return True
-            except ValueError:
-                return False
-        
-        return False
\ No newline at end of file
+        # Only trace if file is in our project; this also rules out Django internals
+        return filename.startswith(self._prefix)
\ No newline at end of file
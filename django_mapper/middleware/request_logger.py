@@ -1,38 +1,212 @@
-import json
+import atexit
+import os
+import queue
+import re
+import threading
 import time
 import traceback
 from pathlib import Path
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
 from django.urls import resolve
 from django.db import connection
 
+from django_mapper.utils.helpers import json_dumps, json_loads
+
+# Header names never written to the log
+SENSITIVE_HEADERS = frozenset({'authorization', 'cookie', 'x-api-key'})
+
+# Substrings that mark a POST field as sensitive
+SENSITIVE_KEYS = ('password', 'token', 'secret', 'api_key', 'credit_card')
+
+# DJANGO_MAPPER settings, resolved once for every middleware instance
+_CONFIG = getattr(settings, 'DJANGO_MAPPER', {})
+
+def _reload_settings(setting, **kwargs):
+    """Re-resolve the module-level settings when they are overridden (e.g. in tests)"""
+    global _CONFIG
+    if setting == 'DJANGO_MAPPER':
+        _CONFIG = getattr(settings, 'DJANGO_MAPPER', {})
+
+setting_changed.connect(_reload_settings)
+
+# Writers by log directory, owned by the process in _writers_pid
+_writers = {}
+_writers_pid = None
+_writers_lock = threading.Lock()
+
+def _get_writer(log_dir: Path) -> '_RequestLogWriter':
+    """Return this process's writer for log_dir, starting it on first use"""
+    global _writers_pid
+    pid = os.getpid()
+    if _writers_pid == pid:
+        writer = _writers.get(log_dir)
+        if writer is not None:
+            return writer
+    
+    with _writers_lock:
+        # A forked worker inherits the parent's writers but not their threads
+        if _writers_pid != pid:
+            _writers.clear()
+            _writers_pid = pid
+        
+        writer = _writers.get(log_dir)
+        if writer is None:
+            writer = _writers[log_dir] = _RequestLogWriter(log_dir)
+        return writer
+
+def _stop_writers():
+    """Drain and stop the writers this process started"""
+    if _writers_pid == os.getpid():
+        for writer in list(_writers.values()):
+            writer.stop()
+
+atexit.register(_stop_writers)
+
+class _RequestLogWriter:
+    """Append request data to one log directory from a background thread"""
+    
+    def __init__(self, log_dir: Path):
+        self.log_dir = log_dir
+        self.log_file = log_dir / 'requests.jsonl'
+        self.runtime_file = log_dir / 'runtime_data.json'
+        
+        # One long-lived unbuffered append handle; each batch goes out as a single
+        # O_APPEND write, so batches from separate worker processes do not interleave
+        self._log_handle = open(self.log_file, 'ab', buffering=0)
+        
+        # Requests are written by a background thread, off the response path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_queued_requests, name='django-mapper-logger', daemon=True)
+        self._thread.start()
+    
+    def put(self, request_data: dict):
+        """Queue request data for the background thread"""
+        self._queue.put(request_data)
+    
+    def stop(self):
+        """Let the thread drain what is already queued, then stop it"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+    
+    def _write_queued_requests(self):
+        """Write queued requests in batches until the stop sentinel arrives"""
+        while True:
+            batch = [self._queue.get()]
+            
+            # Anything else already waiting shares the same flush
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stopping = None in batch
+            if stopping:
+                batch = batch[:batch.index(None)]
+            
+            if batch:
+                self._write_requests(batch)
+            
+            if stopping:
+                self._close()
+                return
+    
+    def _close(self):
+        """Sync the log to disk and close it"""
+        try:
+            os.fsync(self._log_handle.fileno())
+        except OSError as e:
+            print(f"Failed to sync request log: {e}")
+        finally:
+            self._log_handle.close()
+    
+    def _write_requests(self, batch: list):
+        """Write a batch of request data to the log file"""
+        try:
+            self._log_handle.write(b''.join(json_dumps(request_data) + b'\n' for request_data in batch))
+            
+            # Also save aggregated runtime data for visualization
+            self._update_runtime_data(self.runtime_file, batch)
+        except Exception as e:
+            print(f"Failed to log request: {e}")
+    
+    def _update_runtime_data(self, runtime_file: Path, batch: list):
+        """Update aggregated runtime data"""
+        
+        # This read-modify-write is not locked; with several worker processes
+        # one may overwrite another's update, so requests.jsonl is the full record
+        try:
+            # Load existing data
+            if runtime_file.exists():
+                runtime_data = json_loads(runtime_file.read_bytes())
+                runtime_data['url_patterns'] = set(runtime_data.get('url_patterns', []))
+                runtime_data['views'] = set(runtime_data.get('views', []))
+            else:
+                runtime_data = {
+                    'requests': [],
+                    'url_patterns': set(),
+                    'views': set(),
+                    'stats': {'total_requests': 0}
+                }
+            
+            for request_data in batch:
+                # Add request
+                runtime_data['requests'].append(request_data)
+                runtime_data['stats']['total_requests'] += 1
+                
+                # Track URLs and views
+                if request_data.get('path'):
+                    runtime_data['url_patterns'].add(request_data['path'])
+                if request_data.get('view_name'):
+                    runtime_data['views'].add(request_data['view_name'])
+            
+            # Convert sets to lists for JSON serialization
+            runtime_data['url_patterns'] = list(runtime_data.get('url_patterns', set()))
+            runtime_data['views'] = list(runtime_data.get('views', set()))
+            
+            # Save
+            runtime_file.write_bytes(json_dumps(runtime_data, indent=True))
+        except Exception as e:
+            print(f"Failed to update runtime data: {e}")
+
 class RequestLoggerMiddleware:
     """Middleware to log all requests and their flow through the application"""
     
     def __init__(self, get_response):
         self.get_response = get_response
-        self.config = getattr(settings, 'DJANGO_MAPPER', {})
+        self.config = _CONFIG
         self.enabled = self.config.get('ENABLED', settings.DEBUG)
         self.log_dir = Path(self.config.get('LOG_DIR', './django_mapper_logs'))
         self.exclude_paths = self.config.get('EXCLUDE_PATHS', ['/static/', '/media/'])
+        self._exclude_search = (
+            re.compile('|'.join(re.escape(pattern) for pattern in self.exclude_paths)).search
+            if self.exclude_paths else None
+        )
         self.track_queries = self.config.get('TRACK_QUERIES', True)
+        self.query_detail = self.config.get('QUERY_DETAIL', 'full')  # 'full' or 'count'
+        self._view_names = {}  # Map of view callable to its dotted name
+        
+        # Drop out of the middleware chain entirely when logging is off
+        if not self.enabled:
+            raise MiddlewareNotUsed()
         
-        if self.enabled:
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-            self.log_file = self.log_dir / 'requests.jsonl'
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.log_dir / 'requests.jsonl'
     
     def __call__(self, request):
-        if not self.enabled or self._should_exclude(request.path):
+        if self._should_exclude(request.path):
             return self.get_response(request)
         
         # Start timing
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Capture request info
         request_data = self._capture_request_info(request)
         
-        # Reset query counter
-        if self.track_queries:
+        # Reset query counter; nothing is recorded unless DEBUG or a debug cursor is on
+        if self.track_queries and connection.queries_logged:
             connection.queries_log.clear()
         
         # Process request
@@ -47,7 +221,10 @@ class RequestLoggerMiddleware:
             raise
         finally:
             # Calculate duration
-            request_data['duration_ms'] = (time.time() - start_time) * 1000
+            request_data['duration_ms'] = (time.perf_counter_ns() - start_ns) / 1_000_000
+            
+            # Django has resolved the URL by now, so reuse its match
+            request_data.update(self._capture_resolver_info(request))
             
             # Capture queries
             if self.track_queries:
@@ -60,133 +237,117 @@ class RequestLoggerMiddleware:
     
     def _should_exclude(self, path: str) -> bool:
         """Check if path should be excluded from logging"""
-        for exclude_pattern in self.exclude_paths:
-            if exclude_pattern in path:
-                return True
-        return False
+        return self._exclude_search is not None and self._exclude_search(path) is not None
     
     def _capture_request_info(self, request) -> dict:
         """Capture detailed request information"""
         
-        # Resolve URL to view
-        try:
-            resolved = resolve(request.path)
-            view_name = self._get_view_name(resolved)
-            url_name = resolved.url_name
-            app_name = resolved.app_name
-        except:
-            view_name = None
-            url_name = None
-            app_name = None
-        
         return {
             'timestamp': time.time(),
             'method': request.method,
             'path': request.path,
             'full_path': request.get_full_path(),
-            'view_name': view_name,
-            'url_name': url_name,
-            'app_name': app_name,
+            'view_name': None,  # Filled in by _capture_resolver_info after the response
+            'url_name': None,
+            'app_name': None,
             'user': str(request.user) if hasattr(request, 'user') else None,
             'is_authenticated': request.user.is_authenticated if hasattr(request, 'user') else False,
             'get_params': dict(request.GET),
-            'post_params': self._sanitize_post_data(dict(request.POST)),
+            'post_params': self._capture_post_params(request),
             'headers': self._capture_headers(request),
             'session_key': request.session.session_key if hasattr(request, 'session') else None,
         }
     
+    def _capture_resolver_info(self, request) -> dict:
+        """Capture the view and URL names the request resolved to"""
+        
+        # Resolve URL to view, only if Django did not get that far itself
+        try:
+            resolved = getattr(request, 'resolver_match', None) or resolve(request.path)
+            return {
+                'view_name': self._get_view_name(resolved),
+                'url_name': resolved.url_name,
+                'app_name': resolved.app_name,
+            }
+        except:
+            return {}
+    
     def _get_view_name(self, resolved) -> str:
         """Get the view name from resolved URL"""
         view = resolved.func
         
+        view_name = self._view_names.get(view)
+        if view_name is not None:
+            return view_name
+        
         # For class-based views
         if hasattr(view, 'view_class'):
-            return f"{view.view_class.__module__}.{view.view_class.__name__}"
+            view_name = f"{view.view_class.__module__}.{view.view_class.__name__}"
         
         # For function-based views
-        return f"{view.__module__}.{view.__name__}"
+        else:
+            view_name = f"{view.__module__}.{view.__name__}"
+        
+        # Views are few and long-lived; only dynamically built callables could grow this
+        if len(self._view_names) >= 1024:
+            self._view_names.clear()
+        self._view_names[view] = view_name
+        return view_name
     
     def _capture_headers(self, request) -> dict:
         """Capture relevant headers (excluding sensitive ones)"""
         headers = {}
-        sensitive_headers = ['authorization', 'cookie', 'x-api-key']
         
         for key, value in request.META.items():
             if key.startswith('HTTP_'):
                 header_name = key[5:].replace('_', '-').lower()
-                if header_name not in sensitive_headers:
+                if header_name not in SENSITIVE_HEADERS:
                     headers[header_name] = value
         
         return headers
     
+    def _capture_post_params(self, request) -> dict:
+        """Capture sanitized POST params, leaving multipart uploads unparsed"""
+        
+        # Only POST requests populate request.POST
+        if request.method != 'POST':
+            return {}
+        
+        # Reading request.POST would parse (and keep) the whole upload for the log
+        if request.content_type == 'multipart/form-data':
+            return {}
+        
+        return self._sanitize_post_data(dict(request.POST))
+    
     def _sanitize_post_data(self, data: dict) -> dict:
         """Remove sensitive data from POST params"""
-        sensitive_keys = ['password', 'token', 'secret', 'api_key', 'credit_card']
         sanitized = {}
         
         for key, value in data.items():
-            if any(sensitive in key.lower() for sensitive in sensitive_keys):
+            key_lower = key.lower()
+            if any(sensitive in key_lower for sensitive in SENSITIVE_KEYS):
                 sanitized[key] = '***REDACTED***'
             else:
                 sanitized[key] = value
         
         return sanitized
     
-    def _capture_queries(self) -> list:
+    def _capture_queries(self):
         """Capture database queries executed during request"""
-        queries = []
         
-        for query in connection.queries:
-            queries.append({
-                'sql': query['sql'],
-                'time': float(query['time']),
-            })
+        # Count-only mode skips copying every SQL string into the log
+        if self.query_detail == 'count':
+            return {'count': len(connection.queries_log)}
+        
+        # Without DEBUG or a debug cursor nothing was recorded to copy
+        if not connection.queries_logged:
+            return []
         
-        return queries
+        return [
+            {'sql': query['sql'], 'time': float(query['time'])}
+            for query in connection.queries
+        ]
     
     def _log_request(self, request_data: dict):
-        """Write request data to log file"""
-        try:
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(request_data) + '\n')
-            
-            # Also save aggregated runtime data for visualization
-            runtime_file = self.log_dir / 'runtime_data.json'
-            self._update_runtime_data(runtime_file, request_data)
-        except Exception as e:
-            print(f"Failed to log request: {e}")
-    
-    def _update_runtime_data(self, runtime_file: Path, request_data: dict):
-        """Update aggregated runtime data"""
-        try:
-            # Load existing data
-            if runtime_file.exists():
-                with open(runtime_file, 'r') as f:
-                    runtime_data = json.load(f)
-            else:
-                runtime_data = {
-                    'requests': [],
-                    'url_patterns': set(),
-                    'views': set(),
-                    'stats': {'total_requests': 0}
-                }
-            
-            # Add request
-            runtime_data['requests'].append(request_data)
-            runtime_data['stats']['total_requests'] += 1
-            
-            # Track URLs and views
-            if request_data.get('path'):
-                runtime_data['url_patterns'].add(request_data['path'])
-            if request_data.get('view_name'):
-                runtime_data['views'].add(request_data['view_name'])
-            
-            # Convert sets to lists for JSON serialization
-            runtime_data['url_patterns'] = list(runtime_data.get('url_patterns', set()))
-            runtime_data['views'] = list(runtime_data.get('views', set()))
-            
-            # Save
-            with open(runtime_file, 'w') as f:
-                json.dump(runtime_data, f, indent=2)
-        except Exception as e:
-            print(f"Failed to update runtime data: {e}")
\ No newline at end of file
+        """Queue request data for this process's log writer"""
+        _get_writer(self.log_dir).put(request_data)
@@ -1,7 +1,8 @@
-import json
 from pathlib import Path
 from typing import Dict, Optional
 
+from django_mapper.utils.helpers import json_dumps, json_loads
+
 class LogStore:
     """Store and retrieve analysis and runtime data"""
     
@@ -12,8 +13,7 @@ class LogStore:
     def save(self, data: Dict):
         """Save data to JSON file"""
         try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, default=str)
+            self.file_path.write_bytes(json_dumps(data, indent=True, default=str))
         except Exception as e:
             print(f"Error saving data: {e}")
     
@@ -23,8 +23,7 @@ class LogStore:
             return None
         
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_loads(self.file_path.read_bytes())
         except Exception as e:
             print(f"Error loading data: {e}")
             return None
@@ -32,7 +31,7 @@ class LogStore:
     def append(self, data: Dict):
         """Append data to existing file (for logs)"""
         try:
-            with open(self.file_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(data, default=str) + '\n')
+            with open(self.file_path, 'ab') as f:
+                f.write(json_dumps(data, default=str) + b'\n')
         except Exception as e:
             print(f"Error appending data: {e}")
\ No newline at end of file
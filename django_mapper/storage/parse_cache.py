@@ -0,0 +1,83 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+# Bump when ASTParser.parse_file or ModelTracker._parse_models_file changes the shape of its result
+PARSE_CACHE_VERSION = 6
+
+def parse_cache_path(project_path: Path) -> Path:
+    """Cache file for a project, kept in the user's cache directory and never inside the analyzed tree"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    project_key = hashlib.sha256(str(Path(project_path).resolve()).encode()).hexdigest()[:16]
+    return Path(cache_home) / 'django_mapper' / f'{project_key}.sqlite'
+
+class ParseCache:
+    """Persist ASTParser results between runs, keyed by file path and content hash"""
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = None
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use, discarding entries from an older format"""
+        if self._conn is not None:
+            return self._conn
+        
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            if conn.execute('PRAGMA user_version').fetchone()[0] != PARSE_CACHE_VERSION:
+                conn.execute('DROP TABLE IF EXISTS parsed_files')
+                conn.execute(f'PRAGMA user_version = {PARSE_CACHE_VERSION}')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS parsed_files '
+                '(path TEXT PRIMARY KEY, sha BLOB NOT NULL, blob BLOB NOT NULL)'
+            )
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening parse cache {self.db_path}: {e}")
+            return None
+        
+        self._conn = conn
+        return conn
+    
+    def get(self, path: str, sha: bytes) -> Optional[Dict]:
+        """Return the cached result for this exact file content, if any"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        
+        # A corrupt row or blob is just a miss; the file is parsed again
+        try:
+            row = conn.execute('SELECT sha, blob FROM parsed_files WHERE path = ?', (path,)).fetchone()
+            if row is None or row[0] != sha:
+                return None
+            return pickle.loads(row[1])
+        except Exception:
+            return None
+    
+    def put(self, path: str, sha: bytes, parsed: Dict):
+        """Store a parse result; written to disk by close()"""
+        conn = self._connect()
+        if conn is None:
+            return
+        
+        conn.execute(
+            'INSERT OR REPLACE INTO parsed_files (path, sha, blob) VALUES (?, ?, ?)',
+            (path, sha, pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+    
+    def close(self):
+        """Commit pending inserts in one transaction and close the database"""
+        if self._conn is None:
+            return
+        
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error saving parse cache {self.db_path}: {e}")
+        finally:
+            self._conn.close()
+            self._conn = None
\ No newline at end of file
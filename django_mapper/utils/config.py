@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Dict, List
 import json
+import os
 
 class Config:
     """Configuration management for Django Mapper"""
@@ -10,6 +11,7 @@ class Config:
             'include_tests': False,
             'include_migrations': False,
             'max_file_size_kb': 500,
+            'use_cache': True,  # Keep parse results between runs in the user cache directory
             'exclude_patterns': [
                 'site-packages',
                 'venv',
@@ -63,6 +65,7 @@ class Config:
     
     def __init__(self, config_path: Path = None):
         self.config = self.DEFAULT_CONFIG.copy()
+        self._excluded_dirs = {}  # Map of (directory, project path) to whether its path alone excludes its files
         
         if config_path and config_path.exists():
             self.load_from_file(config_path)
@@ -78,6 +81,7 @@ class Config:
     
     def _merge_config(self, user_config: Dict):
         """Merge user configuration with defaults"""
+        self._excluded_dirs.clear()
         for section, values in user_config.items():
             if section in self.config:
                 if isinstance(values, dict):
@@ -93,6 +97,7 @@ class Config:
     
     def set(self, section: str, key: str, value):
         """Set configuration value"""
+        self._excluded_dirs.clear()
         if section not in self.config:
             self.config[section] = {}
         self.config[section][key] = value
@@ -143,15 +148,34 @@ class Config:
         if not self.get('filtering', 'only_project_code'):
             return True
         
-        # Must be within project
-        try:
-            file_path.relative_to(project_path)
-        except ValueError:
+        # Files in one directory share its location and path fragments, so decide those once
+        key = (file_path.parent, project_path)
+        dir_excluded = self._excluded_dirs.get(key)
+        if dir_excluded is None:
+            dir_excluded = self._excluded_dirs[key] = self._is_excluded_dir(file_path.parent, project_path)
+        if dir_excluded:
             return False
         
         # Check exclusions
         return not self.should_exclude_file(file_path)
     
+    def _is_excluded_dir(self, dir_path: Path, project_path: Path) -> bool:
+        """Check if a directory's path alone rules out every file directly inside it"""
+        
+        # Must be within project
+        try:
+            dir_path.relative_to(project_path)
+        except ValueError:
+            return True
+        
+        # A fragment found in the directory path is found in each of its file paths too
+        dir_str = os.path.join(str(dir_path), '')
+        for pattern in self.get('analysis', 'exclude_patterns', []):
+            if pattern in dir_str:
+                return True
+        
+        return bool(self.get('filtering', 'exclude_migration_files')) and 'migration' in dir_str
+    
     def get_color_for_type(self, node_type: str) -> str:
         """Get color for a node type"""
         colors = self.get('visualization', 'color_scheme', {})
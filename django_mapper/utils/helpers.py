@@ -1,8 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Set, Optional
+from typing import Callable, List, Dict, Set, Optional, Iterator
+import ast
 import hashlib
+import json
+import mmap
+import os
 import re
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the standard library
+    orjson = None
+
+# Directory names that are never part of the project source tree
+SCAN_SKIP_DIRS = frozenset({'venv', '.venv', 'site-packages', '.git', '__pycache__', 'node_modules'})
+
+# Below this many files, worker process startup costs more than parallel parsing saves
+PARALLEL_MIN_FILES = 50
+
+# Below this many files, overlapping reads on threads does not pay for the pool
+THREADED_IO_MIN_FILES = 256
+
+# Concurrent reads kept in flight by thread_map
+IO_THREADS = 16
+
+# Bytes read at a time when counting lines
+LINE_COUNT_CHUNK = 1 << 16
+
 def sanitize_identifier(text: str) -> str:
     """Sanitize text for use as an identifier"""
     # Replace special characters with underscores
@@ -16,6 +43,93 @@ def sanitize_identifier(text: str) -> str:
         sanitized = 'n_' + sanitized
     return sanitized or 'node'
 
+def scandir_recursive(path, skip=SCAN_SKIP_DIRS) -> Iterator[os.DirEntry]:
+    """Recursively yield directory entries, skipping symlinks and excluded directories"""
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip:
+                        continue
+                    yield entry
+                    yield from scandir_recursive(entry.path, skip)
+                else:
+                    yield entry
+    except OSError:
+        return
+
+def walk_ast(node) -> Iterator[ast.AST]:
+    """Iterate over a node and all its descendants in source order using an explicit stack"""
+    AST = ast.AST
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    
+    while stack:
+        current = pop()
+        yield current
+        
+        children = []
+        for field in current._fields:
+            value = getattr(current, field, None)
+            if isinstance(value, AST):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, AST))
+        
+        # Push in reverse so children are visited first-to-last
+        for child in reversed(children):
+            push(child)
+
+def process_map(func: Callable, items: List) -> List:
+    """Map a picklable top-level function over items across all CPU cores, preserving order"""
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(items) // (4 * workers))
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except (OSError, BrokenProcessPool) as e:
+        print(f"Error starting worker processes, falling back to serial: {e}")
+        return [func(item) for item in items]
+
+def thread_map(func: Callable, items: List) -> List:
+    """Map an I/O-bound function over items on a thread pool, preserving order"""
+    with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(items)) or 1) as executor:
+        return list(executor.map(func, items))
+
+def json_dumps(data, indent: bool = False, default=None) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, default=default, option=option)
+    return json.dumps(data, indent=2 if indent else None, default=default).encode('utf-8')
+
+def json_loads(data: bytes):
+    """Parse UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def relative_path(file_path: Path, project_path: Path) -> str:
+    """Path of a file relative to the project, stripped as a string prefix when it can be"""
+    file_str = str(file_path)
+    prefix = os.path.join(str(project_path), '')
+    if file_str.startswith(prefix):
+        return file_str[len(prefix):]
+    return str(Path(file_path).relative_to(project_path))
+
+def dotted_name(node) -> str:
+    """Flatten a Name/Attribute chain into its dotted path (e.g., models.Model)"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    parts.append(node.id if isinstance(node, ast.Name) else '')
+    return '.'.join(reversed(parts))
+
 def shorten_path(file_path: str, max_length: int = 50) -> str:
     """Shorten a file path for display"""
     if len(file_path) <= max_length:
@@ -44,6 +158,37 @@ def get_file_hash(file_path: Path) -> str:
     except:
         return ''
 
+@contextmanager
+def mapped_file(file_path: Path):
+    """Map a file read-only instead of copying it into memory; empty files yield b''"""
+    with open(file_path, 'rb') as f:
+        # mmap refuses zero-length files
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+def file_sha256(file_path: Path) -> bytes:
+    """SHA-256 digest of a file's bytes, hashed straight from the page cache"""
+    with mapped_file(file_path) as content:
+        return hashlib.sha256(content).digest()
+
+def count_lines(file_path: Path) -> int:
+    """Count a file's lines on its raw bytes, without decoding or splitting it"""
+    lines = 0
+    last_chunk = b''
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(LINE_COUNT_CHUNK), b''):
+            lines += chunk.count(b'\n')
+            last_chunk = chunk
+    
+    # A last line without a trailing newline still counts
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        lines += 1
+    return lines
+
 def is_django_project(path: Path) -> bool:
     """Check if directory contains a Django project"""
     indicators = [
@@ -78,10 +223,14 @@ def find_django_settings(project_path: Path) -> Optional[Path]:
         if candidate.exists():
             return candidate
     
-    # Search in subdirectories
-    for settings_file in project_path.rglob('settings.py'):
+    # Search in subdirectories, without descending into virtualenvs and caches
+    for entry in scandir_recursive(project_path):
+        if entry.name != 'settings.py' or not entry.is_file():
+            continue
+        
         # Skip migrations, tests, etc.
-        if 'migrations' not in str(settings_file) and 'tests' not in str(settings_file):
+        if 'migrations' not in entry.path and 'tests' not in entry.path:
+            settings_file = Path(entry.path)
             parent_has_init = (settings_file.parent / '__init__.py').exists()
             if parent_has_init:
                 return settings_file
@@ -1,9 +1,12 @@
-import json
 from pathlib import Path
 from jinja2 import Template
 from typing import Dict, List, Any
 
+from django_mapper.utils.helpers import json_dumps
+
 class HTMLGenerator:
+    _template = None  # Compiled HTML_TEMPLATE, shared by every generator
+    
     def __init__(self, data, runtime_mode=False):
         self.data = data
         self.runtime_mode = runtime_mode
@@ -16,13 +19,13 @@ class HTMLGenerator:
         # Transform the data to match template expectations
         template_data = self._prepare_template_data()
         
-        html_content = template.render(
-            **template_data,
-            data_json=json.dumps(template_data, indent=2, default=str)
-        )
+        # Compact JSON: the payload is only read by the page's script.
+        # Escape "</" so a value can never close the surrounding <script> tag.
+        data_json = json_dumps(template_data, default=str).decode('utf-8').replace('</', '<\\/')
         
+        # Stream the rendered chunks straight to disk instead of building the whole page in memory
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            template.stream(**template_data, data_json=data_json).dump(f)
     
     def _prepare_template_data(self):
         """Prepare data in the format the template expects"""
@@ -233,8 +236,13 @@ class HTMLGenerator:
         return flows
     
     def _get_template(self):
-        """Get the comprehensive HTML template"""
-        template_content = '''<!DOCTYPE html>
+        """Get the comprehensive HTML template, compiling it only once per process"""
+        if HTMLGenerator._template is None:
+            HTMLGenerator._template = Template(HTML_TEMPLATE)
+        return HTMLGenerator._template
+
+# Jinja source of the report page, compiled lazily by HTMLGenerator._get_template
+HTML_TEMPLATE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -424,6 +432,9 @@ class HTMLGenerator:
             padding: 25px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.05);
             transition: transform 0.2s, box-shadow 0.2s;
+            /* Skip layout and paint for cards outside the viewport */
+            content-visibility: auto;
+            contain-intrinsic-size: auto 220px;
         }
         
         .card:hover {
@@ -557,6 +568,8 @@ class HTMLGenerator:
             padding: 20px;
             margin-bottom: 15px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+            content-visibility: auto;
+            contain-intrinsic-size: auto 160px;
         }
         
         .flow-steps {
@@ -1343,7 +1356,12 @@ python manage.py runserver
         </main>
     </div>
     
+    <script type="application/json" id="map-data">{{ data_json | safe }}</script>
+    
     <script>
+        // Parse the embedded payload once instead of evaluating it as a JS literal
+        const mapData = JSON.parse(document.getElementById('map-data').textContent);
+        
         // Initialize Mermaid
         mermaid.initialize({ 
             startOnLoad: true,
@@ -1370,28 +1388,41 @@ python manage.py runserver
             event.target.closest('.nav-item').classList.add('active');
         }
         
-        // Filter cards
-        function filterCards(containerId, event) {
-            const filter = event.target.value.toLowerCase();
+        // Latest search text per container, applied at most once per animation frame
+        const pendingFilters = new Map();
+        
+        function scheduleFilter(containerId, cardClass, filter) {
+            if (!pendingFilters.has(containerId)) {
+                requestAnimationFrame(() => {
+                    const latest = pendingFilters.get(containerId);
+                    pendingFilters.delete(containerId);
+                    applyFilter(containerId, cardClass, latest);
+                });
+            }
+            pendingFilters.set(containerId, filter);
+        }
+        
+        function applyFilter(containerId, cardClass, filter) {
             const container = document.getElementById(containerId);
-            const cards = container.getElementsByClassName('card');
+            const cards = container.getElementsByClassName(cardClass);
             
             for (let card of cards) {
-                const text = card.textContent.toLowerCase();
-                card.style.display = text.includes(filter) ? '' : 'none';
+                // Lowercase each card's text once and reuse it for every later search
+                if (card._search === undefined) {
+                    card._search = card.textContent.toLowerCase();
+                }
+                card.hidden = !card._search.includes(filter);
             }
         }
         
+        // Filter cards
+        function filterCards(containerId, event) {
+            scheduleFilter(containerId, 'card', event.target.value.toLowerCase());
+        }
+        
         // Filter flows
         function filterFlows(event) {
-            const filter = event.target.value.toLowerCase();
-            const container = document.getElementById('flows-container');
-            const cards = container.getElementsByClassName('flow-card');
-            
-            for (let card of cards) {
-                const text = card.textContent.toLowerCase();
-                card.style.display = text.includes(filter) ? '' : 'none';
-            }
+            scheduleFilter('flows-container', 'flow-card', event.target.value.toLowerCase());
         }
         
         // Filter class types
@@ -1417,8 +1448,7 @@ python manage.py runserver
         }
         
         // Log data for debugging
-        console.log('Django Mapper Data:', {{ data_json | safe }});
+        console.log('Django Mapper Data:', mapData);
     </script>
 </body>
-</html>'''
-        return Template(template_content)
\ No newline at end of file
+</html>'''
\ No newline at end of file
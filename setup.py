@@ -14,6 +14,9 @@ setup(
         'jinja2>=3.0',
         'pyyaml>=5.4',
     ],
+    extras_require={
+        'fast': ['orjson>=3.6'],
+    },
     entry_points={
         'console_scripts': [
             'django-mapper=django_mapper.cli.main:cli',